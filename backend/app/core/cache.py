@@ -0,0 +1,231 @@
+import asyncio
+import importlib
+import logging
+import time
+from functools import wraps
+from typing import Any, Callable, Optional, Union
+from cachetools import LRUCache
+from app.core.cache_backend import CacheBackend, MemoryBackend
+from app.core.config import (
+    CACHE_MAX_ENTRIES,
+    CACHE_BACKEND,
+    CACHE_LEASE_TTL,
+    CACHE_LEASE_WAIT,
+    CACHE_LEASE_POLL_INTERVAL,
+    CACHE_LEASE_MAX_POLL_INTERVAL,
+    DISK_CACHE_MIN_TTL,
+)
+from app.core.disk_cache import disk_cache
+from app.core.rate_limiter import QuotaExceeded
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+# 永不过期（只会被 LRU 淘汰）
+FOREVER = float("inf")
+
+_MISSING = object()
+
+TTLPolicy = Union[float, Callable[..., float]]
+
+
+def _create_shared_backend(name: str) -> Optional[CacheBackend]:
+    """
+    根据 CACHE_BACKEND 创建 worker 之间共享的二级缓存，"memory" 表示不共享
+    """
+    if name == "memory":
+        return None
+    if name == "sqlite":
+        return disk_cache
+    module_name, _, class_name = name.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown CACHE_BACKEND '{name}' (use 'sqlite', 'memory' or 'module:Class')")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+# 一级缓存：进程内，最快（编码好的响应等不能序列化的对象也放在这里）
+response_cache = MemoryBackend(CACHE_MAX_ENTRIES)
+# 二级缓存：所有 worker 共享，重启后依然有效（未启用时为 None）
+shared_cache: Optional[CacheBackend] = _create_shared_backend(CACHE_BACKEND)
+# 每个键最近一次的结果（不考虑过期），上游额度用完时作为兜底数据
+_last_known = LRUCache(maxsize=CACHE_MAX_ENTRIES)
+
+
+def make_key(endpoint: str, args: tuple, kwargs: dict) -> tuple:
+    """
+    缓存键 = (端点名, 位置参数, 排序后的关键字参数)
+    """
+    return (endpoint, args, tuple(sorted(kwargs.items())))
+
+
+# 共享缓存的读写是同步 I/O（SQLite 查询、压缩/解压，写冲突时还要等锁），
+# 都放到线程中执行，不阻塞事件循环；出错一律当作未命中
+
+async def _shared_get(key: tuple, allow_stale: bool = False):
+    if shared_cache is None:
+        return None
+    try:
+        return await asyncio.to_thread(shared_cache.get_with_expiry, repr(key), allow_stale)
+    except Exception as e:
+        logger.warning("Shared cache read failed: %s", e)
+        return None
+
+
+async def _shared_set(key: tuple, value: Any, ttl: float):
+    if shared_cache is None or ttl < DISK_CACHE_MIN_TTL:
+        return
+    try:
+        await asyncio.to_thread(shared_cache.set, repr(key), value, ttl)
+    except (TypeError, ValueError) as e:
+        logger.warning("Shared cache write failed (value not serializable): %s", e)
+    except Exception as e:
+        logger.warning("Shared cache write failed: %s", e)
+
+
+async def _stale(key: tuple):
+    """
+    获取已过期的旧数据：先查内存，再查共享缓存，都没有返回 _MISSING
+    """
+    value = _last_known.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+    hit = await _shared_get(key, allow_stale=True)
+    return _MISSING if hit is None else hit[0]
+
+
+async def is_cached(endpoint: str, *args, **kwargs) -> bool:
+    """
+    判断某次调用的结果是否已经在缓存中（进程内或共享缓存），不会触发上游请求
+    """
+    key = make_key(endpoint, args, kwargs)
+    return response_cache.get(key, _MISSING) is not _MISSING or await _shared_get(key) is not None
+
+
+async def _store(key: tuple, value: Any, ttl: float):
+    response_cache.set(key, value, ttl)
+    _last_known[key] = value
+    await _shared_set(key, value, ttl)
+
+
+async def _acquire_lease(lease_key: str) -> bool:
+    try:
+        return await asyncio.to_thread(shared_cache.acquire_lease, lease_key, CACHE_LEASE_TTL)
+    except Exception as e:
+        # 无法协调时自己加载，最坏情况只是多一次上游请求
+        logger.warning("Cache lease unavailable: %s", e)
+        return True
+
+
+async def _release_lease(lease_key: str):
+    try:
+        await asyncio.to_thread(shared_cache.release_lease, lease_key)
+    except Exception as e:
+        logger.warning("Cache lease release failed: %s", e)
+
+
+def _poll_peer(lease_key: str):
+    """
+    在线程中执行：一次查询租约状态和结果，返回 (结果, 租约是否仍被持有)。
+    先查租约再查结果：持有者先写结果再释放租约，租约已释放时一定能读到它写入的结果
+    """
+    held = shared_cache.lease_held(lease_key)
+    return shared_cache.get_with_expiry(lease_key), held
+
+
+async def _wait_for_peer(lease_key: str):
+    """
+    等待持有租约的 worker 把结果写入共享缓存，返回 (值, 剩余秒数)；
+    持有者放弃（结果不可缓存或出错）或等待超时返回 None。检查间隔逐次翻倍，减少查询次数
+    """
+    deadline = time.monotonic() + CACHE_LEASE_WAIT
+    interval = CACHE_LEASE_POLL_INTERVAL
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        await asyncio.sleep(min(interval, remaining))
+        interval = min(interval * 2, CACHE_LEASE_MAX_POLL_INTERVAL)
+        try:
+            hit, held = await asyncio.to_thread(_poll_peer, lease_key)
+        except Exception as e:
+            logger.warning("Cache lease check failed: %s", e)
+            return None
+        if hit is not None or not held:
+            return hit
+
+
+async def _fill(endpoint: str, key: tuple, seconds: float, should_cache, func, args, kwargs):
+    """
+    未命中时加载数据并写入缓存。结果会写入共享缓存时先取得这个键的加载租约：
+    所有 worker 中同一时间只有一个请求上游，其余 worker 等它写入共享缓存后直接读取
+    """
+    lease_key = None
+    if shared_cache is not None and seconds >= DISK_CACHE_MIN_TTL:
+        lease_key = repr(key)
+        if not await _acquire_lease(lease_key):
+            hit = await _wait_for_peer(lease_key)
+            if hit is not None:
+                metrics.cache_requests.labels(endpoint, "shared_wait").inc()
+                value, remaining = hit
+                response_cache.set(key, value, remaining)
+                _last_known[key] = value
+                return value
+            lease_key = None  # 对方没有写入结果，自己请求上游（不再持有租约）
+    try:
+        value = await func(*args, **kwargs)
+        if should_cache is None or should_cache(value):
+            await _store(key, value, seconds)
+        return value
+    finally:
+        if lease_key is not None:
+            await _release_lease(lease_key)
+
+
+def cached(endpoint: str, ttl: TTLPolicy, should_cache: Optional[Callable[[Any], bool]] = None):
+    """
+    异步函数的缓存装饰器：先查进程内缓存，再查共享缓存（所有 worker 共用、重启后依然有效），
+    最后才调用上游；同一个键的并发未命中在进程内和 worker 之间都只请求一次上游。
+    上游额度用完（QuotaExceeded）时，如果有旧数据则返回旧数据。
+
+    Args:
+        endpoint: 端点名称，作为缓存键的一部分
+        ttl: 固定秒数，或者接收与被装饰函数相同参数、返回秒数的策略函数
+             （返回 0 表示不缓存，返回 FOREVER 表示永久缓存）
+        should_cache: 可选，判断某个结果是否值得缓存（例如上游返回了错误信息）
+    """
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            # 延迟导入：singleflight 本身依赖本模块的 make_key
+            from app.core.singleflight import single_flight
+
+            key = make_key(endpoint, args, kwargs)
+            value = response_cache.get(key, _MISSING)
+            if value is not _MISSING:
+                metrics.cache_requests.labels(endpoint, "hit").inc()
+                return value
+
+            hit = await _shared_get(key)
+            if hit is not None:
+                metrics.cache_requests.labels(endpoint, "shared_hit").inc()
+                value, remaining = hit
+                response_cache.set(key, value, remaining)
+                _last_known[key] = value
+                return value
+
+            metrics.cache_requests.labels(endpoint, "miss").inc()
+            seconds = ttl(*args, **kwargs) if callable(ttl) else ttl
+            try:
+                return await single_flight.do(
+                    ("fill", key), _fill, endpoint, key, seconds, should_cache, func, args, kwargs
+                )
+            except QuotaExceeded as e:
+                # 上游额度用完：返回旧数据，总比一个注定被拒绝的请求好
+                stale = await _stale(key)
+                if stale is _MISSING:
+                    raise
+                metrics.cache_requests.labels(endpoint, "stale").inc()
+                logger.warning("Serving stale %s data: %s", endpoint, e, extra={"endpoint": endpoint})
+                return stale
+        return wrapper
+    return decorator
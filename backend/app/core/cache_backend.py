@@ -0,0 +1,135 @@
+"""
+缓存后端接口。cached 装饰器先查进程内的 MemoryBackend（一级缓存），
+再查由 CACHE_BACKEND 选择的共享后端（二级缓存，所有 worker 共用，例如 disk_cache.DiskCache）。
+共享后端通过加载租约实现跨 worker 的请求合并：同一个键同一时间只有一个 worker 请求上游。
+"""
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Hashable, Optional, Tuple
+from cachetools import TLRUCache
+from app.core import metrics
+
+
+class CacheBackend(ABC):
+    """
+    缓存后端需要实现的操作。
+    进程内后端的键可以是任意可哈希对象；共享后端的键是字符串，值必须能被 JSON 序列化。
+    """
+
+    # 是否在 worker 进程之间共享
+    shared = False
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        hit = self.get_with_expiry(key)
+        return default if hit is None else hit[0]
+
+    @abstractmethod
+    def get_with_expiry(self, key: Hashable, allow_stale: bool = False) -> Optional[Tuple[Any, float]]:
+        """
+        返回 (值, 剩余秒数)，不存在或已过期时返回 None；剩余秒数为 inf 表示永不过期。
+        allow_stale=True 时后端可以返回已过期但尚未清理的条目（剩余秒数 <= 0）
+        """
+
+    @abstractmethod
+    def set(self, key: Hashable, value: Any, ttl: float):
+        """
+        写入一个条目，ttl <= 0 时不写入，inf 表示永不过期
+        """
+
+    @abstractmethod
+    def delete(self, key: Hashable):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+    def close(self):
+        pass
+
+    # --- 加载租约：进程内后端不需要（同一进程内由 single_flight 合并） ---
+
+    def acquire_lease(self, key: Hashable, ttl: float) -> bool:
+        """
+        尝试取得某个键的加载租约，取得返回 True；租约在 ttl 秒后自动失效
+        """
+        return True
+
+    def release_lease(self, key: Hashable):
+        pass
+
+    def lease_held(self, key: Hashable) -> bool:
+        """
+        是否有其他 worker 正持有这个键的有效租约
+        """
+        return False
+
+
+class _Entry:
+    __slots__ = ("value", "ttl", "expires_at")
+
+    def __init__(self, value: Any, ttl: float):
+        self.value = value
+        self.ttl = ttl
+        self.expires_at = time.monotonic() + ttl
+
+
+def _time_to_use(key, entry: _Entry, now: float) -> float:
+    return now + entry.ttl
+
+
+class _CountingTLRUCache(TLRUCache):
+    """
+    记录过期清理和容量淘汰次数的 TLRUCache
+    """
+
+    def __init__(self, name: str, maxsize: int):
+        super().__init__(maxsize=maxsize, ttu=_time_to_use)
+        self.name = name
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        if expired:
+            metrics.cache_evictions.labels(self.name, "expired").inc(len(expired))
+        return expired
+
+    def popitem(self):
+        item = super().popitem()
+        metrics.cache_evictions.labels(self.name, "capacity").inc()
+        return item
+
+
+class MemoryBackend(CacheBackend):
+    """
+    进程内缓存：每个条目有自己的 TTL，容量有上限，满了按 LRU 淘汰。
+    值按引用保存（不序列化），可以缓存任意对象
+    """
+
+    def __init__(self, maxsize: int, name: str = "memory"):
+        self._cache = _CountingTLRUCache(name, maxsize)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._cache.get(key)
+        return entry.value if entry is not None else default
+
+    def get_with_expiry(self, key: Hashable, allow_stale: bool = False) -> Optional[Tuple[Any, float]]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        return entry.value, entry.expires_at - time.monotonic()
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        if ttl > 0:
+            self._cache[key] = _Entry(value, ttl)
+
+    def delete(self, key: Hashable):
+        self._cache.pop(key, None)
+
+    def clear(self):
+        self._cache.clear()
+
+    def __contains__(self, key: Hashable):
+        return key in self._cache
+
+    def __len__(self):
+        return len(self._cache)
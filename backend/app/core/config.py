@@ -12,4 +12,161 @@ UNSPLASH_API_KEY = os.getenv("UNSPLASH_API_KEY")
 
 # 检查密钥是否成功加载 (可选，但推荐)
 if not NBA_API_KEY:
-    raise ValueError("NBA_API_KEY not found in .env file")
\ No newline at end of file
+    raise ValueError("NBA_API_KEY not found in .env file")
+
+# --- 上游地址 ---
+# 默认指向各提供方的正式地址；基准测试等场景可以指向本地的模拟服务
+API_SPORTS_URL = os.getenv("API_SPORTS_URL", "https://v2.nba.api-sports.io")
+NEWS_API_URL = os.getenv("NEWS_API_URL", "https://newsapi.org")
+OPENWEATHERMAP_URL = os.getenv("OPENWEATHERMAP_URL", "https://api.openweathermap.org")
+UNSPLASH_API_URL = os.getenv("UNSPLASH_API_URL", "https://api.unsplash.com")
+# nba_api 使用的 stats.nba.com 地址，为空时使用 nba_api 的默认值
+NBA_STATS_URL = os.getenv("NBA_STATS_URL", "")
+
+# --- 日志 ---
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# text（默认）或 json（每行一条 JSON，便于日志系统采集）
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+
+# --- 上游 HTTP 连接池配置 ---
+# 每个上游主机一个连接池，以下限制作用于单个连接池
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+# 超时（秒）：连接超时单独配置，其余（读/写/等待连接池）共用一个值
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+# 上游支持时使用 HTTP/2（需要安装 h2，未安装时自动退回 HTTP/1.1）
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# --- 上游响应缓存配置 ---
+# 内存缓存最多保存的条目数，超出后按 LRU 淘汰
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+# 会变化的数据（当前赛季、球员/球队资料等）的默认 TTL（秒）
+CACHE_DEFAULT_TTL = float(os.getenv("CACHE_DEFAULT_TTL", "21600"))
+# 实时数据（当天赛程）的 TTL（秒）
+CACHE_LIVE_TTL = float(os.getenv("CACHE_LIVE_TTL", "60"))
+# 新闻的 TTL（秒）
+CACHE_NEWS_TTL = float(os.getenv("CACHE_NEWS_TTL", "900"))
+# 城市图片的 TTL（秒）
+CACHE_IMAGE_TTL = float(os.getenv("CACHE_IMAGE_TTL", "86400"))
+# 天气（当前天气、预报、空气质量）的 TTL（秒）
+CACHE_WEATHER_TTL = float(os.getenv("CACHE_WEATHER_TTL", "600"))
+
+# --- 本地数据目录 ---
+# 运行时生成的数据（球队目录、磁盘缓存等）保存在这里
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), ".cache"))
+
+# --- 球队/城市/场馆注册表 ---
+# 注册表的 JSON 快照（纯数据，不用 pickle：CACHE_DIR 可写不应等于可以执行代码），加快启动；
+# 设置为空字符串则每次从源数据构建
+REGISTRY_SNAPSHOT_PATH = os.getenv("REGISTRY_SNAPSHOT_PATH", os.path.join(CACHE_DIR, "registry.json"))
+
+# --- 持久化磁盘缓存 (SQLite) ---
+# 设置为空字符串可关闭磁盘缓存
+DISK_CACHE_PATH = os.getenv("DISK_CACHE_PATH", os.path.join(CACHE_DIR, "cache.sqlite3"))
+DISK_CACHE_MAX_BYTES = int(float(os.getenv("DISK_CACHE_MAX_MB", "256")) * 1024 * 1024)
+# TTL 不少于这个秒数的条目才写入磁盘（当天赛程这类很快过期的数据只放内存）
+DISK_CACHE_MIN_TTL = float(os.getenv("DISK_CACHE_MIN_TTL", "300"))
+
+# --- 缓存后端 ---
+# 各 worker 共享的二级缓存："sqlite"（上面的磁盘缓存文件，同一台机器上的 worker 共享）、
+# "memory"（不共享，每个 worker 只用自己的进程内缓存），或 "模块:类名" 指定自定义的 CacheBackend 实现
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")
+# 加载租约的有效期（秒）：未命中时只有持有租约的 worker 请求上游，其他 worker 等它写入共享缓存；
+# 持有者崩溃时租约到期自动失效
+CACHE_LEASE_TTL = float(os.getenv("CACHE_LEASE_TTL", "30"))
+# 等待其他 worker 加载的最长时间（秒，约一次上游请求的超时），超时后自己请求上游
+CACHE_LEASE_WAIT = float(os.getenv("CACHE_LEASE_WAIT", "10"))
+# 检查间隔（秒）：从 CACHE_LEASE_POLL_INTERVAL 开始每次翻倍，最长 CACHE_LEASE_MAX_POLL_INTERVAL
+CACHE_LEASE_POLL_INTERVAL = float(os.getenv("CACHE_LEASE_POLL_INTERVAL", "0.05"))
+CACHE_LEASE_MAX_POLL_INTERVAL = float(os.getenv("CACHE_LEASE_MAX_POLL_INTERVAL", "0.5"))
+# 球员姓名 -> NBA 官方 ID 解析结果的进程内缓存条目数
+PLAYER_ID_CACHE_MAX_ENTRIES = int(os.getenv("PLAYER_ID_CACHE_MAX_ENTRIES", "10000"))
+
+# --- 启动预热 ---
+# 开启后，应用启动时在后台预先拉取球队资料、各队阵容和联盟榜单
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "false").lower() in ("1", "true", "yes")
+WARMUP_SEASONS = [s.strip() for s in os.getenv("WARMUP_SEASONS", "2021,2022,2023").split(",") if s.strip()]
+# 同时进行的预热请求数
+WARMUP_CONCURRENCY = int(os.getenv("WARMUP_CONCURRENCY", "4"))
+# 单次预热最多发出的上游请求数（已缓存的数据不计入）
+WARMUP_BUDGET = int(os.getenv("WARMUP_BUDGET", "120"))
+
+# --- 启动后预加载 ---
+# 延迟导入的重量级模块，在服务就绪后于后台线程中导入，第一次 /leaders 或 /player-details 请求不必等待；
+# 设为空字符串则关闭预加载（完全按需导入）
+PRELOAD_MODULES = [m.strip() for m in os.getenv("PRELOAD_MODULES", "numpy,nba_api.stats.endpoints").split(",") if m.strip()]
+# 服务就绪后等待多久（秒）再开始预加载，让启动阶段的请求先得到处理
+PRELOAD_DELAY = float(os.getenv("PRELOAD_DELAY", "1.0"))
+
+# --- nba_api 专用线程池 ---
+NBA_API_MAX_WORKERS = int(os.getenv("NBA_API_MAX_WORKERS", "4"))
+# 最多排队等待的调用数，超出直接拒绝
+NBA_API_MAX_QUEUE = int(os.getenv("NBA_API_MAX_QUEUE", "16"))
+# 单次调用的截止时间（秒），同时作为 nba_api 的 HTTP 超时
+NBA_API_TIMEOUT = float(os.getenv("NBA_API_TIMEOUT", "20"))
+
+# --- 上游额度与限流 ---
+# 各提供方的额度：(每分钟请求数, 每日请求数)，默认值为各自免费套餐的限制
+UPSTREAM_QUOTAS = {
+    "api-sports": (int(os.getenv("API_SPORTS_PER_MINUTE", "10")), int(os.getenv("API_SPORTS_PER_DAY", "100"))),
+    "newsapi": (int(os.getenv("NEWS_API_PER_MINUTE", "30")), int(os.getenv("NEWS_API_PER_DAY", "100"))),
+    "openweathermap": (int(os.getenv("WEATHER_API_PER_MINUTE", "60")), int(os.getenv("WEATHER_API_PER_DAY", "30000"))),
+    "unsplash": (int(os.getenv("UNSPLASH_API_PER_MINUTE", "50")), int(os.getenv("UNSPLASH_API_PER_DAY", "1200"))),
+}
+# 每日预算中为交互请求保留的比例，后台预热和诊断请求不能使用这部分
+RATE_LIMIT_INTERACTIVE_RESERVE = float(os.getenv("RATE_LIMIT_INTERACTIVE_RESERVE", "0.2"))
+# 各优先级（交互 / 后台 / 诊断）等待令牌的最长时间（秒），超过则改用缓存数据
+RATE_LIMIT_MAX_WAIT = {
+    0: float(os.getenv("RATE_LIMIT_INTERACTIVE_MAX_WAIT", "2")),
+    1: float(os.getenv("RATE_LIMIT_BACKGROUND_MAX_WAIT", "60")),
+    2: float(os.getenv("RATE_LIMIT_DIAGNOSTIC_MAX_WAIT", "10")),
+}
+
+# --- /team-details 延迟预算与熔断 ---
+# 整个请求的时间预算（秒），包括解析球队名称
+TEAM_DETAILS_BUDGET = float(os.getenv("TEAM_DETAILS_BUDGET", "3.0"))
+# 各数据源单独的超时（秒），实际超时取它与剩余预算中较小的一个
+SOURCE_TIMEOUTS = {
+    "roster": float(os.getenv("ROSTER_TIMEOUT", "2.5")),
+    "news": float(os.getenv("NEWS_TIMEOUT", "1.5")),
+    "weather": float(os.getenv("WEATHER_TIMEOUT", "2.0")),
+    "image": float(os.getenv("IMAGE_TIMEOUT", "1.5")),
+}
+# 连续失败多少次后熔断，以及熔断后多久放行试探请求（秒）
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+
+# --- /weather/arenas ---
+# 批量获取各场馆天气时同时进行的上游请求数
+WEATHER_ARENAS_CONCURRENCY = int(os.getenv("WEATHER_ARENAS_CONCURRENCY", "5"))
+
+# --- /players/batch 与 /teams/batch ---
+# 单次批量请求最多包含的球员/球队数
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "50"))
+# 批量请求中同时处理的球员/球队数
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+# --- /schedule 日期范围 ---
+# 单次最多查询的天数，以及同时请求的天数
+SCHEDULE_MAX_DAYS = int(os.getenv("SCHEDULE_MAX_DAYS", "62"))
+SCHEDULE_CONCURRENCY = int(os.getenv("SCHEDULE_CONCURRENCY", "4"))
+
+# --- 响应编码与压缩 ---
+# 响应体达到这个大小（字节）才压缩，小响应压缩得不偿失
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+# 仅在安装了 brotli 时使用
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+# 热点接口（/team-details、/leaders）编码好的响应字节缓存的 TTL（秒）；
+# 底层数据有各自的缓存，这里只决定多久重新组装一次，0 表示不缓存
+PAYLOAD_CACHE_TTL = float(os.getenv("PAYLOAD_CACHE_TTL", "60"))
+
+# --- 浏览器 / CDN 缓存（Cache-Control） ---
+# 实时数据（当前赛季、今天前后的赛程、球队详情）：短时间缓存，过期后可先用旧数据再后台重新验证
+HTTP_CACHE_LIVE_MAX_AGE = int(os.getenv("HTTP_CACHE_LIVE_MAX_AGE", "60"))
+HTTP_CACHE_LIVE_STALE_WHILE_REVALIDATE = int(os.getenv("HTTP_CACHE_LIVE_STALE_WHILE_REVALIDATE", "300"))
+# 历史数据（已结束的赛季、已过去的日期）：不会再变化，长时间缓存
+HTTP_CACHE_HISTORICAL_MAX_AGE = int(os.getenv("HTTP_CACHE_HISTORICAL_MAX_AGE", "86400"))
+HTTP_CACHE_HISTORICAL_STALE_WHILE_REVALIDATE = int(os.getenv("HTTP_CACHE_HISTORICAL_STALE_WHILE_REVALIDATE", "604800"))
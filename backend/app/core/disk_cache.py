@@ -0,0 +1,183 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Optional, Tuple
+from app.core.config import DISK_CACHE_PATH, DISK_CACHE_MAX_BYTES
+from app.core.cache_backend import CacheBackend
+from app.core import metrics
+
+# 每写入多少次检查一次总大小
+_EVICTION_CHECK_INTERVAL = 50
+# 超出上限时清理到上限的这个比例
+_EVICTION_TARGET_RATIO = 0.9
+# 读取时最多每隔多少秒刷新一次访问时间（避免每次读取都写库）
+_TOUCH_INTERVAL = 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at);
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+def serialize(value: Any) -> bytes:
+    """
+    紧凑的序列化格式：去掉空白的 JSON，再用 zlib 压缩
+    """
+    return zlib.compress(json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+
+
+def deserialize(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class DiskCache(CacheBackend):
+    """
+    基于 SQLite 的持久化缓存，也是默认的共享缓存后端。
+    - 每个条目记录过期时间（NULL 表示永不过期），重启后依然有效
+    - 总大小超过上限时，先删除过期条目，再按最近访问时间淘汰（所有 worker 看到同一份淘汰结果）
+    - 使用 WAL 模式，同一台机器上的多个 worker 进程可以共享同一个文件
+    - leases 表记录加载租约，跨进程合并同一个键的上游请求
+    """
+
+    shared = True
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+        # 打开连接的进程；fork 出的 worker 不能继续使用父进程的连接
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            self._conn = None
+            self._pid = os.getpid()
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def get_with_expiry(self, key: str, allow_stale: bool = False) -> Optional[Tuple[Any, float]]:
+        """
+        返回 (值, 剩余秒数)，不存在或已过期时返回 None；剩余秒数为 inf 表示永不过期。
+        allow_stale=True 时即使已过期也返回（剩余秒数 <= 0），用于上游不可用时兜底。
+        """
+        now = time.time()
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value, expires_at, accessed_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            blob, expires_at, accessed_at = row
+            remaining = float("inf") if expires_at is None else expires_at - now
+            if remaining <= 0 and not allow_stale:
+                return None
+            if now - accessed_at > _TOUCH_INTERVAL:
+                self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        try:
+            return deserialize(blob), remaining
+        except (zlib.error, ValueError):
+            return None
+
+    def get(self, key: str, default: Any = None, allow_stale: bool = False) -> Any:
+        hit = self.get_with_expiry(key, allow_stale)
+        return default if hit is None else hit[0]
+
+    def set(self, key: str, value: Any, ttl: float):
+        if ttl <= 0:
+            return
+        blob = serialize(value)
+        now = time.time()
+        expires_at = None if ttl == float("inf") else now + ttl
+        with self._lock:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), expires_at, now),
+            )
+            self._writes += 1
+            if self._writes % _EVICTION_CHECK_INTERVAL == 0:
+                self._evict(now)
+
+    def _evict(self, now: float):
+        conn = self._conn
+        (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()
+        if total <= self.max_bytes:
+            return
+        expired = conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        metrics.cache_evictions.labels("disk", "expired").inc(max(expired.rowcount, 0))
+        (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()
+        target = self.max_bytes * _EVICTION_TARGET_RATIO
+        if total <= target:
+            return
+        # 按最近访问时间从旧到新删除，直到低于目标大小
+        freed = 0
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM cache ORDER BY accessed_at"):
+            doomed.append((key,))
+            freed += size
+            if total - freed <= target:
+                break
+        conn.executemany("DELETE FROM cache WHERE key = ?", doomed)
+        metrics.cache_evictions.labels("disk", "capacity").inc(len(doomed))
+
+    def delete(self, key: str):
+        with self._lock:
+            self._connect().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._connect().execute("DELETE FROM cache")
+
+    def acquire_lease(self, key: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            # 持有者崩溃或超时留下的过期租约可以被接管
+            conn.execute("DELETE FROM leases WHERE key = ? AND expires_at <= ?", (key, now))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO leases (key, owner, expires_at) VALUES (?, ?, ?)",
+                (key, str(os.getpid()), now + ttl),
+            )
+            return cursor.rowcount == 1
+
+    def release_lease(self, key: str):
+        with self._lock:
+            self._connect().execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, str(os.getpid())))
+
+    def lease_held(self, key: str) -> bool:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT 1 FROM leases WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row is not None
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# 全局共享的磁盘缓存（未启用时为 None）
+disk_cache: Optional[DiskCache] = DiskCache(DISK_CACHE_PATH, DISK_CACHE_MAX_BYTES) if DISK_CACHE_PATH else None
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+
+class ExecutorSaturated(Exception):
+    """
+    排队的任务已达上限，新任务被直接拒绝（而不是无限排队）
+    """
+
+
+class BlockingExecutor:
+    """
+    专用于阻塞调用（如 nba_api）的有界线程池：
+    - 线程数和排队数都有上限，不会占满默认线程池、影响其他 to_thread 调用
+    - 每次调用可以设置截止时间，超时后未开始的任务会被取消
+    - 记录排队深度、运行时间等指标
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, default_timeout: Optional[float] = None):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.default_timeout = default_timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-worker")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+        self.max_run_seconds = 0.0
+
+    def _execute(self, submitted_at: float, func: Callable, args: tuple):
+        started_at = time.monotonic()
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            self.total_wait_seconds += started_at - submitted_at
+        succeeded = False
+        try:
+            result = func(*args)
+            succeeded = True
+            return result
+        finally:
+            elapsed = time.monotonic() - started_at
+            with self._lock:
+                self.running -= 1
+                self.total_run_seconds += elapsed
+                self.max_run_seconds = max(self.max_run_seconds, elapsed)
+                if succeeded:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+
+    def _dequeue_cancelled(self, future):
+        # 排队中被取消的任务不会执行 _execute，需要在这里修正排队计数
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None):
+        """
+        在线程池中运行阻塞函数。超过截止时间抛出 asyncio.TimeoutError，
+        排队已满抛出 ExecutorSaturated。
+        """
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturated(f"{self.name} executor queue is full ({self.max_queue})")
+            self.queued += 1
+        future = self._pool.submit(self._execute, time.monotonic(), func, args)
+        future.add_done_callback(self._dequeue_cancelled)
+
+        deadline = timeout if timeout is not None else self.default_timeout
+        try:
+            # 超时或调用方被取消时，wait_for 会一并取消尚未开始执行的任务
+            return await asyncio.wait_for(asyncio.wrap_future(future), deadline)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            raise
+
+    def stats(self) -> dict:
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "timed_out": self.timed_out,
+                "rejected": self.rejected,
+                "avg_wait_seconds": round(self.total_wait_seconds / finished, 4) if finished else 0.0,
+                "avg_run_seconds": round(self.total_run_seconds / finished, 4) if finished else 0.0,
+                "max_run_seconds": round(self.max_run_seconds, 4),
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# 名称 -> 执行器，后续的其他阻塞集成可以注册自己的执行器或复用已有的
+_executors: Dict[str, BlockingExecutor] = {}
+
+
+def get_executor(name: str, max_workers: int = 4, max_queue: int = 16,
+                 default_timeout: Optional[float] = None) -> BlockingExecutor:
+    """
+    获取（或首次创建）指定名称的执行器，之后的调用会忽略参数直接返回已创建的实例
+    """
+    executor = _executors.get(name)
+    if executor is None:
+        executor = BlockingExecutor(name, max_workers, max_queue, default_timeout)
+        _executors[name] = executor
+    return executor
+
+
+def all_stats() -> Dict[str, dict]:
+    return {name: executor.stats() for name, executor in _executors.items()}
+
+
+def shutdown_all():
+    for executor in _executors.values():
+        executor.shutdown()
+    _executors.clear()
@@ -0,0 +1,111 @@
+import time
+import httpx
+from typing import Dict, Iterable
+from urllib.parse import urlsplit
+from app.core.config import (
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_TIMEOUT,
+    HTTP2_ENABLED,
+)
+from app.core import metrics, rate_limiter
+
+try:
+    import h2  # noqa: F401  httpx 的 HTTP/2 支持依赖 h2
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+# 上游主机 (scheme://host[:port]) -> 该主机专用的长连接客户端
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def register_upstream(url: str, provider: str):
+    """
+    声明某个上游地址属于哪个提供方，该主机的请求会经过对应的限流器
+    """
+    parts = urlsplit(url)
+    rate_limiter.register_host(parts.hostname, provider, parts.port)
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """
+    包装真正的传输层，记录每次上游调用的延迟和结果。
+    限流等待发生在请求钩子中（传输层之前），不计入延迟。
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        provider = rate_limiter.provider_for(request.url.host, request.url.port) or request.url.host
+        endpoint = request.url.path
+        in_progress = metrics.upstream_requests_in_progress.labels(provider)
+        in_progress.inc()
+        started_at = time.monotonic()
+        status = "error"
+        try:
+            response = await self._transport.handle_async_request(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            in_progress.dec()
+            metrics.observe_upstream(provider, endpoint, status, time.monotonic() - started_at)
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def _create_client() -> httpx.AsyncClient:
+    transport = httpx.AsyncHTTPTransport(
+        http2=HTTP2_ENABLED and _HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+    return httpx.AsyncClient(
+        event_hooks={"request": [rate_limiter.on_request]},
+        transport=InstrumentedTransport(transport),
+        timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+    )
+
+
+def get_client(url: str) -> httpx.AsyncClient:
+    """
+    获取某个上游主机的共享客户端。
+    同一主机的所有请求复用一个连接池，避免每次调用都重新进行 TCP+TLS 握手。
+    如果在 lifespan 之外调用（例如诊断脚本），会按需创建客户端。
+    """
+    origin = _origin(url)
+    client = _clients.get(origin)
+    if client is None or client.is_closed:
+        client = _create_client()
+        _clients[origin] = client
+    return client
+
+
+async def startup(urls: Iterable[str] = ()):
+    """
+    应用启动时调用：为已知的上游主机预先创建客户端
+    """
+    for url in urls:
+        get_client(url)
+
+
+async def shutdown():
+    """
+    应用关闭时调用：关闭所有连接池
+    """
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
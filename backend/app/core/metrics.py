@@ -0,0 +1,123 @@
+"""
+Prometheus 指标：接口延迟、上游调用、缓存命中率和各组件的实时状态，
+通过 /metrics 以 Prometheus 文本格式导出。
+指标按进程统计，多 worker 部署时由 Prometheus 分别抓取各进程。
+"""
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    PlatformCollector,
+    ProcessCollector,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+# 使用独立的 registry，避免重复导入模块时重复注册
+registry = CollectorRegistry()
+ProcessCollector(registry=registry)
+PlatformCollector(registry=registry)
+
+# 从几毫秒的缓存命中到 nba_api 的慢请求
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# --- 本服务的接口 ---
+http_requests = Counter(
+    "http_requests_total", "HTTP requests handled, by route template and status code",
+    ["method", "route", "status"], registry=registry,
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Time until the response headers are sent, by route template",
+    ["method", "route"], buckets=LATENCY_BUCKETS, registry=registry,
+)
+http_requests_in_progress = Gauge(
+    "http_requests_in_progress", "HTTP requests currently being handled",
+    ["method", "route"], registry=registry,
+)
+
+# --- 上游调用（HTTP 上游与 nba_api） ---
+upstream_requests = Counter(
+    "upstream_requests_total", "Upstream calls by provider, endpoint and outcome (HTTP status or 'error')",
+    ["provider", "endpoint", "status"], registry=registry,
+)
+upstream_request_duration = Histogram(
+    "upstream_request_duration_seconds", "Upstream call latency, excluding local rate-limit waits",
+    ["provider", "endpoint"], buckets=LATENCY_BUCKETS, registry=registry,
+)
+upstream_requests_in_progress = Gauge(
+    "upstream_requests_in_progress", "Upstream calls currently in flight",
+    ["provider"], registry=registry,
+)
+
+# --- 缓存 ---
+cache_requests = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache name and result (hit, shared_hit, shared_wait, miss, stale)",
+    ["cache", "result"], registry=registry,
+)
+cache_evictions = Counter(
+    "cache_evictions_total", "Entries removed from a cache, by reason (expired, capacity)",
+    ["cache", "reason"], registry=registry,
+)
+
+
+def observe_upstream(provider: str, endpoint: str, status: str, seconds: float):
+    upstream_requests.labels(provider, endpoint, status).inc()
+    upstream_request_duration.labels(provider, endpoint).observe(seconds)
+
+
+class _StateCollector:
+    """
+    抓取时读取各组件已有的统计信息（请求合并、线程池、限流器、熔断器、缓存容量），
+    不需要在热路径上额外记录
+    """
+
+    def collect(self):
+        # 延迟导入：这些模块本身会导入 metrics
+        from app.core import executor, rate_limiter, resilience
+        from app.core.cache import response_cache
+        from app.core.singleflight import single_flight
+
+        yield GaugeMetricFamily(
+            "singleflight_in_flight", "Distinct upstream calls currently shared by coalesced callers",
+            value=len(single_flight),
+        )
+        yield GaugeMetricFamily(
+            "response_cache_entries", "Entries in the in-memory response cache", value=len(response_cache),
+        )
+
+        queued = GaugeMetricFamily("executor_queued", "Tasks waiting for a worker thread", labels=["executor"])
+        running = GaugeMetricFamily("executor_running", "Tasks running on worker threads", labels=["executor"])
+        for name, stats in executor.all_stats().items():
+            queued.add_metric([name], stats["queued"])
+            running.add_metric([name], stats["running"])
+        yield queued
+        yield running
+
+        used = GaugeMetricFamily("rate_limit_used_today", "Upstream calls made today", labels=["provider"])
+        tokens = GaugeMetricFamily("rate_limit_tokens", "Tokens left in the per-minute bucket", labels=["provider"])
+        waiting = GaugeMetricFamily("rate_limit_waiting", "Calls queued for a rate-limit token", labels=["provider"])
+        for name, stats in rate_limiter.all_stats().items():
+            used.add_metric([name], stats["used_today"])
+            tokens.add_metric([name], stats["tokens"])
+            waiting.add_metric([name], stats["waiting"])
+        yield used
+        yield tokens
+        yield waiting
+
+        states = {"closed": 0, "half_open": 1, "open": 2}
+        circuit = GaugeMetricFamily(
+            "circuit_breaker_state", "Circuit breaker state (0=closed, 1=half_open, 2=open)", labels=["provider"],
+        )
+        for name, stats in resilience.all_stats().items():
+            circuit.add_metric([name], states[stats["state"]])
+        yield circuit
+
+
+registry.register(_StateCollector())
+
+
+def render() -> bytes:
+    return generate_latest(registry)
@@ -0,0 +1,72 @@
+"""
+响应字段投影与分页：客户端通过 fields= 只取需要的字段，通过 limit/offset 分页，
+在已缓存的数据上生成新的对象，不修改缓存中的数据，也不会重新请求上游。
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+# 字段路径树：{"roster": {"firstname": {}, "leagues": {"standard": {"pos": {}}}}}，空字典表示整个值
+FieldTree = Dict[str, "FieldTree"]
+
+
+def parse_fields(raw: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    解析逗号分隔的字段路径（用 . 访问嵌套字段，如 "leagues.standard.pos"），
+    去重并保持顺序；没有指定字段时返回 None（不投影）
+
+    Raises:
+        ValueError: 路径格式不正确（空段，如 "a..b"）
+    """
+    if raw is None:
+        return None
+    fields = []
+    for part in raw.split(","):
+        path = part.strip()
+        if not path:
+            continue
+        if any(not segment for segment in path.split(".")):
+            raise ValueError(f"Invalid field path: '{path}'")
+        if path not in fields:
+            fields.append(path)
+    return tuple(fields) or None
+
+
+def _field_tree(fields: Tuple[str, ...]) -> FieldTree:
+    tree: FieldTree = {}
+    for path in fields:
+        node = tree
+        segments = path.split(".")
+        for i, segment in enumerate(segments):
+            if segment in node and not node[segment]:
+                break  # 已经选择了整个父字段，例如同时给出 "a" 和 "a.b"
+            if i == len(segments) - 1:
+                node[segment] = {}
+            else:
+                node = node.setdefault(segment, {})
+    return tree
+
+
+def _apply(value: Any, tree: FieldTree) -> Any:
+    if not tree:
+        return value
+    if isinstance(value, list):
+        # 列表中的每个元素使用同样的字段
+        return [_apply(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {key: _apply(value[key], subtree) for key, subtree in tree.items() if key in value}
+    return value
+
+
+def project(value: Any, fields: Optional[Tuple[str, ...]]) -> Any:
+    """
+    只保留 fields 中的字段；value 是列表时对每个元素投影。不存在的字段直接忽略
+    """
+    if not fields:
+        return value
+    return _apply(value, _field_tree(fields))
+
+
+def paginate(items: List[Any], offset: int = 0, limit: Optional[int] = None) -> List[Any]:
+    """
+    取 items[offset:offset + limit]（limit 为 None 时取到末尾）
+    """
+    return items[offset:offset + limit if limit is not None else None]
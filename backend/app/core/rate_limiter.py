@@ -0,0 +1,284 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from enum import IntEnum
+from typing import Dict, List, Optional, Tuple
+from app.core.config import (
+    UPSTREAM_QUOTAS,
+    RATE_LIMIT_INTERACTIVE_RESERVE,
+    RATE_LIMIT_MAX_WAIT,
+)
+
+
+class Priority(IntEnum):
+    """
+    上游请求的优先级，数值越小越优先
+    """
+    INTERACTIVE = 0  # 用户正在等待的请求（/search、/player-details 等）
+    BACKGROUND = 1   # 后台预热
+    DIAGNOSTIC = 2   # 诊断工具
+
+
+# 当前请求的优先级，默认视为交互请求；后台任务和诊断接口会显式设置
+current_priority: ContextVar[Priority] = ContextVar("upstream_priority", default=Priority.INTERACTIVE)
+
+
+class SharedPriority:
+    """
+    被合并（single_flight）的一次上游请求的优先级：取所有等待者中最高的优先级。
+    有更高优先级的调用者加入时提升它，并同步调整限流器中已经在排队的请求
+    """
+
+    def __init__(self, level: Priority):
+        self.level = level
+        # 这次请求在各限流器中排队的位置
+        self._queued: List[Tuple["ProviderLimiter", "_Waiter"]] = []
+        # 它内部再合并的请求（例如 cached 的加载内部又调用 coalesced 的函数），一起提升
+        self._linked: List["SharedPriority"] = []
+
+    def raise_to(self, level: Priority):
+        if level >= self.level:
+            return
+        self.level = level
+        for limiter, waiter in list(self._queued):
+            limiter._reprioritize(waiter, level)
+        for child in self._linked:
+            child.raise_to(level)
+
+    def link(self, child: "SharedPriority"):
+        self._linked.append(child)
+        child.raise_to(self.level)
+
+
+# 当前代码是否在一次被合并的请求中执行（由 single_flight 设置）；是则使用共享的优先级
+shared_priority: ContextVar[Optional[SharedPriority]] = ContextVar("shared_upstream_priority", default=None)
+
+
+def effective_priority() -> Priority:
+    shared = shared_priority.get()
+    return shared.level if shared is not None else current_priority.get()
+
+
+@contextmanager
+def priority(level: Priority):
+    token = current_priority.set(level)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+class QuotaExceeded(Exception):
+    """
+    上游额度不足（当日预算用完，或排队时间超过上限），调用方应改用缓存数据
+    """
+
+    def __init__(self, provider: str, reason: str):
+        super().__init__(f"{provider}: {reason}")
+        self.provider = provider
+        self.reason = reason
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+class _Waiter:
+    """
+    排队等待令牌的一个请求：按 (优先级, 序号) 排序，序号保证同优先级先到先得
+    """
+    __slots__ = ("level", "seq", "future", "started_at", "deadline", "timer")
+
+    def __init__(self, level: Priority, seq: int, future: asyncio.Future, started_at: float):
+        self.level = level
+        self.seq = seq
+        self.future = future
+        self.started_at = started_at
+        self.deadline = started_at
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.level, self.seq) < (other.level, other.seq)
+
+
+class ProviderLimiter:
+    """
+    单个上游提供方的限流器：
+    - 令牌桶控制每分钟请求数，令牌不足时按优先级排队；
+      每个排队的请求等待自己的 future，补充出令牌时只唤醒队首，不轮询
+    - 统计当日请求数，超过每日预算直接拒绝；
+      低优先级请求不能使用为交互请求预留的最后一部分预算
+    """
+
+    def __init__(self, name: str, per_minute: int, per_day: int):
+        self.name = name
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self._rate = per_minute / 60.0
+        self._tokens = float(per_minute)
+        self._updated_at = time.monotonic()
+        self._day = _today()
+        self.used_today = 0
+        self.rejected = 0
+        # 等待令牌的请求（最小堆）
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        # 下一个令牌补充出来时分发令牌的定时器，只在有人排队时存在
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.per_minute, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+
+    def _check_daily_budget(self, level: Priority):
+        today = _today()
+        if today != self._day:
+            self._day = today
+            self.used_today = 0
+        limit = self.per_day
+        if level > Priority.INTERACTIVE:
+            limit = int(self.per_day * (1 - RATE_LIMIT_INTERACTIVE_RESERVE))
+        if self.used_today >= limit:
+            self.rejected += 1
+            raise QuotaExceeded(self.name, f"daily budget exhausted ({self.used_today}/{self.per_day})")
+
+    def _use_loop(self, loop: asyncio.AbstractEventLoop):
+        # 换了事件循环（例如测试中多次启动应用）时，旧循环上的排队和定时器都已失效
+        if self._loop is not loop:
+            self._loop = loop
+            self._waiters = []
+            self._timer = None
+
+    def _schedule_dispatch(self):
+        if self._timer is None and self._waiters:
+            delay = max((1 - self._tokens) / self._rate, 0.001)
+            self._timer = self._loop.call_later(delay, self._dispatch)
+
+    def _dispatch(self):
+        """
+        把补充出来的令牌按优先级分给队首的请求
+        """
+        self._timer = None
+        self._refill()
+        while self._waiters and self._tokens >= 1:
+            waiter = heapq.heappop(self._waiters)
+            waiter.timer.cancel()
+            self._tokens -= 1
+            waiter.future.set_result(None)
+        self._schedule_dispatch()
+
+    def _set_deadline(self, waiter: _Waiter, deadline: float):
+        if waiter.timer is not None:
+            waiter.timer.cancel()
+        waiter.deadline = deadline
+        waiter.timer = self._loop.call_at(deadline, self._expire, waiter)
+
+    def _reprioritize(self, waiter: _Waiter, level: Priority):
+        # 排队中的请求被提升：调整在堆中的位置，最长等待时间取两个优先级中较长的
+        if waiter.future.done() or level >= waiter.level:
+            return
+        waiter.level = level
+        heapq.heapify(self._waiters)
+        deadline = waiter.started_at + RATE_LIMIT_MAX_WAIT[level]
+        if deadline > waiter.deadline:
+            self._set_deadline(waiter, deadline)
+
+    def _expire(self, waiter: _Waiter):
+        # 排队超过该优先级的最长等待时间：放弃，调用方改用缓存数据
+        if waiter.future.done():
+            return
+        self._waiters.remove(waiter)
+        heapq.heapify(self._waiters)
+        self.rejected += 1
+        waiter.future.set_exception(QuotaExceeded(self.name, "rate limit wait exceeded"))
+
+    async def acquire(self, level: Priority = Priority.INTERACTIVE, shared: Optional[SharedPriority] = None):
+        """
+        申请一个令牌。shared 是被合并请求的共享优先级：排队期间它被提升时，这个请求随之前移
+        """
+        self._check_daily_budget(level)
+        loop = asyncio.get_running_loop()
+        self._use_loop(loop)
+        self._refill()
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+        else:
+            waiter = _Waiter(level, next(self._seq), loop.create_future(), loop.time())
+            heapq.heappush(self._waiters, waiter)
+            self._set_deadline(waiter, waiter.started_at + RATE_LIMIT_MAX_WAIT[level])
+            self._schedule_dispatch()
+            if shared is not None:
+                shared._queued.append((self, waiter))
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                future = waiter.future
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    # 已经分到令牌但调用方被取消：还回去给下一个请求
+                    self._tokens += 1
+                    self._schedule_dispatch()
+                raise
+            finally:
+                waiter.timer.cancel()
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    heapq.heapify(self._waiters)
+                if shared is not None:
+                    shared._queued.remove((self, waiter))
+            level = waiter.level
+        # 等待期间可能已经跨日或被其他请求用完预算
+        self._check_daily_budget(level)
+        self.used_today += 1
+
+    def stats(self) -> dict:
+        self._refill()
+        return {
+            "per_minute": self.per_minute,
+            "per_day": self.per_day,
+            "used_today": self.used_today,
+            "tokens": round(self._tokens, 2),
+            "waiting": len(self._waiters),
+            "rejected": self.rejected,
+        }
+
+
+# 提供方名称 -> 限流器
+_limiters: Dict[str, ProviderLimiter] = {
+    name: ProviderLimiter(name, per_minute, per_day)
+    for name, (per_minute, per_day) in UPSTREAM_QUOTAS.items()
+}
+# 上游 (主机, 端口) -> 提供方名称；使用默认端口时端口为 None
+# 包含端口，这样多个本地模拟服务（同一主机、不同端口）也能区分
+_hosts: Dict[Tuple[str, Optional[int]], str] = {}
+
+
+def register_host(host: str, provider: str, port: Optional[int] = None):
+    _hosts[(host, port)] = provider
+
+
+def provider_for(host: str, port: Optional[int] = None) -> Optional[str]:
+    return _hosts.get((host, port))
+
+
+def get_limiter(provider: str) -> Optional[ProviderLimiter]:
+    return _limiters.get(provider)
+
+
+async def on_request(request):
+    """
+    httpx 请求钩子：发出请求前向对应提供方的限流器申请额度
+    """
+    provider = provider_for(request.url.host, request.url.port)
+    limiter = _limiters.get(provider) if provider else None
+    if limiter is not None:
+        await limiter.acquire(effective_priority(), shared_priority.get())
+
+
+def all_stats() -> Dict[str, dict]:
+    return {name: limiter.stats() for name, limiter in _limiters.items()}
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+from app.core.config import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT
+from app.core.rate_limiter import QuotaExceeded
+
+logger = logging.getLogger(__name__)
+
+# guarded() 返回的状态
+OK = "ok"
+SKIPPED = "skipped"            # 缺少输入（例如没有城市名），没有发起请求
+TIMEOUT = "timeout"            # 超过本次请求分配给该数据源的时间
+CIRCUIT_OPEN = "circuit_open"  # 该提供方连续出错，熔断中，直接跳过
+QUOTA_EXCEEDED = "quota_exceeded"
+ERROR = "error"
+
+
+class CircuitBreaker:
+    """
+    熔断器：连续失败达到阈值后"断开"，在冷却时间内直接失败，不再等待上游；
+    冷却结束后放行一个试探请求（半开），成功则恢复，失败则继续断开。
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release(self):
+        """
+        试探请求没有得出结论（被取消或本地额度不足），允许下一个请求继续试探
+        """
+        self._probing = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {"state": self.state, "failures": self.failures}
+
+
+# 提供方名称 -> 熔断器
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    breaker = _breakers.get(provider)
+    if breaker is None:
+        breaker = CircuitBreaker(provider, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT)
+        _breakers[provider] = breaker
+    return breaker
+
+
+def all_stats() -> Dict[str, dict]:
+    return {name: breaker.stats() for name, breaker in _breakers.items()}
+
+
+async def guarded(provider: str, func: Callable, *args, timeout: float) -> Tuple[Any, str]:
+    """
+    在熔断器和截止时间保护下调用 func(*args)，从不抛出异常。
+    返回 (结果, 状态)，失败时结果为 None。
+    """
+    if timeout <= 0:
+        return None, TIMEOUT
+    breaker = get_breaker(provider)
+    if not breaker.allow():
+        return None, CIRCUIT_OPEN
+    try:
+        result = await asyncio.wait_for(func(*args), timeout)
+    except asyncio.TimeoutError:
+        breaker.record_failure()
+        return None, TIMEOUT
+    except QuotaExceeded:
+        # 本地额度不足，不代表上游有问题，不计入熔断
+        breaker.release()
+        return None, QUOTA_EXCEEDED
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+    except Exception as e:
+        breaker.record_failure()
+        logger.warning("%s call failed: %r", provider, e, extra={"provider": provider})
+        return None, ERROR
+    breaker.record_success()
+    return result, OK
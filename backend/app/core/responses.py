@@ -0,0 +1,281 @@
+"""
+响应编码：更快的 JSON 序列化（安装了 orjson 时使用）、按 Accept-Encoding 压缩，
+以及热点接口编码好（并压缩过）的响应字节缓存，命中时不需要重新序列化和压缩。
+编码好的响应带有内容哈希 ETag 和 Cache-Control，If-None-Match 命中时返回 304。
+"""
+import gzip
+import hashlib
+import json
+import logging
+import math
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import JSONResponse as _StarletteJSONResponse, Response
+from app.core.cache import response_cache
+from app.core.config import (
+    COMPRESSION_MIN_SIZE,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_BROTLI_QUALITY,
+    PAYLOAD_CACHE_TTL,
+    HTTP_CACHE_LIVE_MAX_AGE,
+    HTTP_CACHE_LIVE_STALE_WHILE_REVALIDATE,
+    HTTP_CACHE_HISTORICAL_MAX_AGE,
+    HTTP_CACHE_HISTORICAL_STALE_WHILE_REVALIDATE,
+)
+from app.core import metrics
+
+try:
+    import orjson
+except ImportError:  # 可选依赖，没有时退回标准库 json
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # 可选依赖，没有时只支持 gzip
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# 按优先顺序排列的支持的编码
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def cache_control(max_age: int, stale_while_revalidate: int = 0) -> str:
+    value = f"public, max-age={max_age}"
+    if stale_while_revalidate:
+        value += f", stale-while-revalidate={stale_while_revalidate}"
+    return value
+
+
+# Cache-Control 策略：实时数据短时间缓存，历史数据（已结束的赛季、已过去的日期）长时间缓存，
+# 不完整的结果（数据源降级、部分日期获取失败）每次都要重新验证
+LIVE = cache_control(HTTP_CACHE_LIVE_MAX_AGE, HTTP_CACHE_LIVE_STALE_WHILE_REVALIDATE)
+HISTORICAL = cache_control(HTTP_CACHE_HISTORICAL_MAX_AGE, HTTP_CACHE_HISTORICAL_STALE_WHILE_REVALIDATE)
+NO_CACHE = "no-cache"
+
+# 值得压缩的内容类型（图片等已经压缩过的格式不再压缩）
+_COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def _finite(value: Any) -> Any:
+    """
+    把 NaN/Infinity 替换为 None，其余值原样返回（容器会复制一份）
+    """
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def dumps(content: Any) -> bytes:
+    """
+    序列化为 UTF-8 JSON 字节，无法直接序列化的值（如 datetime）转为字符串。
+    NaN/Infinity 不是合法的 JSON，统一输出为 null：orjson 本身就这样处理，
+    标准库 json 没有对应选项，编码前先把这些值替换为 None，保证两种实现输出一致
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(_finite(content), ensure_ascii=False, allow_nan=False, default=str, separators=(",", ":")).encode("utf-8")
+
+
+class JSONResponse(_StarletteJSONResponse):
+    """
+    使用 dumps 渲染的 JSONResponse，作为应用的默认响应类。
+    注意：接口返回 dict/list 时 FastAPI 仍会先经过 jsonable_encoder 再交给 render，
+    只有直接返回 JSONResponse（或 encoded_response）才能跳过这一步
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    根据 Accept-Encoding 选择压缩方式，客户端不接受任何支持的编码时返回 None
+    """
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def _compressible(content_type: Optional[str]) -> bool:
+    return bool(content_type) and content_type.startswith(_COMPRESSIBLE_TYPES)
+
+
+class EncodedPayload:
+    """
+    序列化好的响应体，各压缩版本和 ETag 在第一次被请求时生成并保留。
+    content 保留原始数据（大部分对象本来就被上游缓存引用），字段投影和分页直接在它上面进行
+    """
+    __slots__ = ("body", "content", "media_type", "cache_control", "_compressed", "_etag")
+
+    def __init__(self, body: bytes, content: Any = None, media_type: str = "application/json",
+                 cache_control: Optional[str] = None):
+        self.body = body
+        self.content = content
+        self.media_type = media_type
+        self.cache_control = cache_control
+        self._compressed: Dict[str, bytes] = {}
+        self._etag: Optional[str] = None
+
+    @property
+    def etag(self) -> str:
+        # 弱 ETag：内容相同即可，与传输时是否压缩无关
+        if self._etag is None:
+            self._etag = f'W/"{hashlib.blake2b(self.body, digest_size=16).hexdigest()}"'
+        return self._etag
+
+    def encoded(self, encoding: str) -> bytes:
+        data = self._compressed.get(encoding)
+        if data is None:
+            data = self._compressed[encoding] = compress(self.body, encoding)
+        return data
+
+    def __len__(self):
+        return len(self.body)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match 使用弱比较：忽略 W/ 前缀
+    if if_none_match.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in tags
+
+
+def payload_response(request: Request, payload: EncodedPayload, cache_control: Optional[str] = None) -> Response:
+    """
+    直接发送编码好的字节；客户端支持压缩且响应足够大时发送压缩版本。
+    客户端已有相同内容（If-None-Match 与 ETag 匹配）时返回不带响应体的 304。
+
+    Args:
+        cache_control: Cache-Control 头，默认使用 payload 自带的策略
+    """
+    headers = {"ETag": payload.etag, "Vary": "Accept-Encoding"}
+    cache_control = cache_control or payload.cache_control
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, payload.etag):
+        return Response(status_code=304, headers=headers)
+
+    body = payload.body
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    if encoding and len(body) >= COMPRESSION_MIN_SIZE:
+        body = payload.encoded(encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type=payload.media_type, headers=headers)
+
+
+def encoded_response(request: Request, content: Any, cache_control: Optional[str] = None) -> Response:
+    """
+    编码 content 并按 payload_response 发送（不缓存编码结果的接口使用）
+    """
+    return payload_response(request, EncodedPayload(dumps(content), content), cache_control)
+
+
+async def cached_payload(
+    endpoint: str,
+    key: Hashable,
+    build: Callable[[], Awaitable[Any]],
+    should_cache: Optional[Callable[[Any], bool]] = None,
+    cache_control: Optional[Callable[[Any], str]] = None,
+) -> EncodedPayload:
+    """
+    获取某个接口编码好的响应：命中时直接返回缓存的字节，否则调用 build 组装数据并编码。
+    与上游数据放在同一个 response_cache 里，共用容量上限和 LRU 淘汰。
+
+    Args:
+        endpoint: 接口名，作为缓存键和指标标签的一部分
+        key: 区分同一接口不同请求的键（例如球队名和赛季）
+        build: 组装响应数据的协程函数
+        should_cache: 可选，判断结果是否值得缓存（例如有数据源降级时不缓存）
+        cache_control: 可选，根据结果选择 Cache-Control 策略
+    """
+    cache_key = ("payload", endpoint, key)
+    payload = response_cache.get(cache_key)
+    if payload is not None:
+        metrics.cache_requests.labels(f"payload.{endpoint}", "hit").inc()
+        return payload
+
+    metrics.cache_requests.labels(f"payload.{endpoint}", "miss").inc()
+    data = await build()
+    payload = EncodedPayload(dumps(data), data, cache_control=cache_control(data) if cache_control else None)
+    if should_cache is None or should_cache(data):
+        response_cache.set(cache_key, payload, PAYLOAD_CACHE_TTL)
+    return payload
+
+
+class CompressionMiddleware:
+    """
+    压缩一次性发送的响应（ASGI 中间件）。
+    流式响应（NDJSON）保持原样逐块发送，已经设置了 Content-Encoding 的响应（payload_response）不再压缩。
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message  # 等看到响应体再决定是否压缩
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or len(body) < self.minimum_size
+                or not _compressible(headers.get("content-type"))
+            ):
+                await send(start)
+                await send(message)
+                return
+
+            body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,69 @@
+import asyncio
+from functools import wraps
+from typing import Dict, Hashable, Tuple
+from app.core.cache import make_key
+from app.core.rate_limiter import SharedPriority, effective_priority, shared_priority
+
+
+class SingleFlight:
+    """
+    合并相同的并发请求：同一个 key 同时只有一个上游请求在进行，
+    其余调用者等待这个请求的结果，而不是各自再发一次。
+    请求以所有等待者中最高的优先级进行：交互请求加入后台预热发起的请求时，
+    它在限流器中的排队随之提前；反过来，后台请求加入交互请求时不会降低它的优先级。
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, Tuple[asyncio.Task, SharedPriority]] = {}
+
+    def __len__(self):
+        return len(self._inflight)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        entry = self._inflight.get(key)
+        if entry is not None and entry[0] is task:
+            del self._inflight[key]
+        # 即使所有调用者都已取消，也要取走异常，避免 "exception was never retrieved" 警告
+        if not task.cancelled():
+            task.exception()
+
+    @staticmethod
+    async def _run(priority: SharedPriority, func, args, kwargs):
+        # Task 有自己的上下文副本，这里设置的共享优先级只对这次请求有效
+        shared_priority.set(priority)
+        return await func(*args, **kwargs)
+
+    async def do(self, key: Hashable, func, *args, **kwargs):
+        level = effective_priority()
+        entry = self._inflight.get(key)
+        if entry is None:
+            # 放在独立的 Task 中执行：发起者被取消（例如超时）不会影响其他等待者
+            priority = SharedPriority(level)
+            task = asyncio.ensure_future(self._run(priority, func, args, kwargs))
+            self._inflight[key] = (task, priority)
+            task.add_done_callback(lambda t, key=key: self._forget(key, t))
+        else:
+            task, priority = entry
+            priority.raise_to(level)
+        # 在另一次合并请求内部调用时，外层被提升，这里也跟着提升
+        outer = shared_priority.get()
+        if outer is not None:
+            outer.link(priority)
+        return await asyncio.shield(task)
+
+
+# 全局共享的请求合并器
+single_flight = SingleFlight()
+
+
+def coalesced(endpoint: str):
+    """
+    异步函数的请求合并装饰器，按 (端点名, 参数) 合并并发调用
+    """
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = make_key(endpoint, args, kwargs)
+            return await single_flight.do(key, func, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,60 @@
+"""
+启动耗时：记录各初始化步骤的耗时，并在服务就绪后于后台线程中预加载延迟导入的重量级模块
+（nba_api 的 endpoints 会导入 pandas，约 0.5 秒），worker 启动时不必付出这部分代价。
+"""
+import asyncio
+import importlib
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+from app.core.config import PRELOAD_MODULES, PRELOAD_DELAY
+
+logger = logging.getLogger(__name__)
+
+# 初始化步骤 -> 耗时（秒），按执行顺序
+_steps: Dict[str, float] = {}
+# 预加载的模块 -> 导入耗时（秒）；已经被请求导入过的模块记为 0
+_preloaded: Dict[str, float] = {}
+
+
+@contextmanager
+def step(name: str):
+    """
+    记录一个初始化步骤的耗时
+    """
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        _steps[name] = time.perf_counter() - started_at
+
+
+async def preload(modules: List[str] = PRELOAD_MODULES, delay: float = PRELOAD_DELAY):
+    """
+    等待 delay 秒后逐个导入 modules。导入在线程中进行，不阻塞事件循环；
+    请求同时用到同一个模块时由导入锁保证只导入一次。
+    """
+    await asyncio.sleep(delay)
+    for name in modules:
+        if name in sys.modules:
+            _preloaded[name] = 0.0
+            continue
+        started_at = time.perf_counter()
+        try:
+            await asyncio.to_thread(importlib.import_module, name)
+        except ImportError as e:
+            logger.warning("Preload of %s failed: %s", name, e)
+            continue
+        _preloaded[name] = time.perf_counter() - started_at
+        logger.debug("Preloaded %s in %.3fs", name, _preloaded[name])
+
+
+def stats() -> dict:
+    return {
+        "steps": {name: round(seconds, 4) for name, seconds in _steps.items()},
+        "startup_seconds": round(sum(_steps.values()), 4),
+        "preloaded": {name: round(seconds, 4) for name, seconds in _preloaded.items()},
+        "pending_preload": [name for name in PRELOAD_MODULES if name not in _preloaded],
+    }
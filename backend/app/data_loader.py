@@ -1,16 +1,10 @@
 # in backend/app/data_loader.py
-import json
-import os
-
-# 构建 arena_coordinates.json 文件的绝对路径
-DATA_FILE_PATH = os.path.join(os.path.dirname(__file__), 'data', 'arena_coordinates.json')
+# 场馆数据现在由 app.registry 在导入时加载一次，这里保留原有的接口
+from app import registry
+from app.registry import ARENA_FILE_PATH as DATA_FILE_PATH
 
 def load_arena_data():
-    try:
-        with open(DATA_FILE_PATH, 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {}
+    return {team.code: team.arena() for team in registry.all_teams() if team.arena_name}
 
 ARENA_DATA = load_arena_data()
 
@@ -18,4 +12,4 @@ def get_arena_coordinates(team_code: str):
     """
     通过球队代码 (e.g., 'LAL') 获取场馆坐标
     """
-    return ARENA_DATA.get(team_code)
\ No newline at end of file
+    return registry.get_arena(team_code)
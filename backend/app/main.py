@@ -1,22 +1,82 @@
 # In backend/app/main.py
 
 import asyncio
+import logging
+import time
 import httpx
-from fastapi import FastAPI, HTTPException, Query
+from contextlib import asynccontextmanager
+from datetime import date as Date, timedelta
+from typing import AsyncIterator, Optional
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-import traceback
+from fastapi.responses import Response, StreamingResponse
+from starlette.routing import Match
 
 # 导入我们自己的服务和模块
-from app.services import nba_service, news_service, weather_service, image_service, leaders_service
-from app.services.leaders_service import get_nba_player_id_by_name
+from app.services import nba_service, news_service, weather_service, image_service, leaders_service, player_index, team_directory, stats_engine, warmup
+from app.services.player_index import get_nba_player_id_by_name
+from app import registry
 from app.data_loader import get_arena_coordinates
 from app.city_mapping import get_weather_city_name
+from app.core import http_client, executor, metrics, rate_limiter, resilience, responses, startup
+from app.core.log import setup_logging
+from app.core.projection import paginate, parse_fields, project
+from app.core.responses import JSONResponse, CompressionMiddleware, cached_payload, dumps, encoded_response, payload_response
+from app.core.config import (
+    WARMUP_ENABLED,
+    TEAM_DETAILS_BUDGET,
+    SOURCE_TIMEOUTS,
+    WEATHER_ARENAS_CONCURRENCY,
+    BATCH_MAX_ITEMS,
+    BATCH_CONCURRENCY,
+    SCHEDULE_MAX_DAYS,
+    SCHEDULE_CONCURRENCY,
+)
+from app.core.cache import shared_cache
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# --- Lifespan ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 为所有上游主机建立共享连接池
+    with startup.step("http_client.startup"):
+        await http_client.startup([
+            nba_service.API_URL,
+            news_service.API_URL,
+            weather_service.CURRENT_WEATHER_URL,
+            image_service.API_URL,
+        ])
+    # 球员姓名索引（NBA 官方 ID 查询、联想搜索）在线程中建立，不阻塞启动和事件循环；
+    # 建好之前到达的查询会等它完成
+    background_tasks = [asyncio.create_task(asyncio.to_thread(player_index.build_index))]
+    # 球队目录：注册表快照中没有 API-Sports 球队数据时在后台拉取一次，不阻塞启动
+    # 属于后台流量：Task 创建时复制当前上下文，所以在 priority() 中创建即可
+    with rate_limiter.priority(rate_limiter.Priority.BACKGROUND):
+        background_tasks.append(asyncio.create_task(team_directory.ensure_loaded()))
+    # 服务就绪后再导入延迟加载的重量级模块（nba_api endpoints / pandas、numpy）
+    background_tasks.append(asyncio.create_task(startup.preload()))
+    # 可选：后台预热缓存，应用立即开始处理请求
+    if WARMUP_ENABLED:
+        background_tasks.append(asyncio.create_task(warmup.run()))
+    logger.info("Startup finished in %.3fs", startup.stats()["startup_seconds"])
+    yield
+    # 关闭：停止后台任务并释放所有连接
+    for task in background_tasks:
+        task.cancel()
+    await http_client.shutdown()
+    executor.shutdown_all()
+    if shared_cache is not None:
+        shared_cache.close()
 
 # --- App Initialization ---
 app = FastAPI(
     title="NBA Universe API",
     description="An API that fuses NBA data with real-world information.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=JSONResponse
 )
 
 # --- CORS Middleware ---
@@ -31,6 +91,71 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- Compression Middleware ---
+# 按 Accept-Encoding 压缩较大的响应（流式响应不压缩，保持逐条推送）
+app.add_middleware(CompressionMiddleware)
+
+# --- Metrics Middleware ---
+def _route_template(request: Request) -> str:
+    """
+    请求对应的路由模板（如 /player-details/{player_id}），未匹配任何路由时返回 "unmatched"，
+    避免每个 ID 都产生一组新的指标
+    """
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    method, route = request.method, _route_template(request)
+    in_progress = metrics.http_requests_in_progress.labels(method, route)
+    in_progress.inc()
+    started_at = time.monotonic()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        in_progress.dec()
+        metrics.http_request_duration.labels(method, route).observe(time.monotonic() - started_at)
+        metrics.http_requests.labels(method, route, str(status)).inc()
+
+# --- Helpers ---
+
+async def _search_teams(query: str):
+    """
+    球队目录就绪时本地搜索，无需网络请求；否则退回 API-Sports 搜索
+    """
+    if team_directory.is_ready():
+        return team_directory.search(query)
+    team_results = await nba_service.search_team_by_name(query)
+    return team_results.get("response", [])
+
+async def _resolve_team(team_name: str):
+    """
+    将球队名称解析为球队数据，找不到返回 None
+    """
+    team_info = team_directory.resolve(team_name) if team_directory.is_ready() else None
+    if team_info:
+        return team_info
+    team_search_result = await nba_service.search_team_by_name(team_name)
+    if not team_search_result or not team_search_result.get("response"):
+        return None
+    return team_search_result["response"][0]
+
+def _parse_fields(raw: Optional[str]):
+    try:
+        return parse_fields(raw)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+# 字段投影参数的说明（各接口共用）
+FIELDS_DESCRIPTION = "逗号分隔的字段，用 . 访问嵌套字段；列表中的每个元素使用同样的字段"
+
 # --- API Endpoints ---
 
 @app.get("/")
@@ -45,7 +170,7 @@ async def search_players_and_teams(query: str = Query(..., min_length=3)):
     query_parts = query.split()
     player_search_term = query_parts[-1]
     try:
-        team_results_task = nba_service.search_team_by_name(query)
+        team_results_task = _search_teams(query)
         player_results_task = nba_service.search_player_by_name(player_search_term)
         team_results, player_results_raw = await asyncio.gather(team_results_task, player_results_task)
         filtered_players = []
@@ -59,235 +184,701 @@ async def search_players_and_teams(query: str = Query(..., min_length=3)):
         else:
             filtered_players = player_results_raw.get("response", [])
         
-        # 为每个球员添加 NBA 官方 ID（用于头像）
+        # 为每个球员添加 NBA 官方 ID（用于头像），一次批量解析。
+        # 球员数据来自缓存，添加字段时复制一份，不修改缓存中的原始数据
+        named_players = [p for p in filtered_players if p.get("firstname") and p.get("lastname")]
+        await player_index.wait_until_ready()
+        official_ids = player_index.resolve_ids(f"{p['firstname']} {p['lastname']}" for p in named_players)
+        players = []
         for player in filtered_players:
-            if player.get("firstname") and player.get("lastname"):
-                nba_official_id = get_nba_player_id_by_name(
-                    player["firstname"], 
-                    player["lastname"]
-                )
-                if nba_official_id:
-                    player["nba_official_id"] = nba_official_id
+            nba_official_id = official_ids.get(f"{player.get('firstname')} {player.get('lastname')}")
+            if nba_official_id:
+                player = {**player, "nba_official_id": nba_official_id}
+            players.append(player)
         
-        return {"teams": team_results.get("response", []), "players": filtered_players}
+        return JSONResponse({"teams": team_results, "players": players})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
-@app.get("/team-details/{team_name}")
-async def get_team_details(team_name: str, season: str = Query("2023")):  # 免费 API 支持 2021-2023
-    try:
-        team_search_result = await nba_service.search_team_by_name(team_name)
-        if not team_search_result or not team_search_result.get("response"):
-            raise HTTPException(status_code=404, detail=f"Team '{team_name}' not found")
-        
-        team_info = team_search_result["response"][0]
-        
-        # 安全地提取字段，使用 .get() 避免 KeyError
-        team_id = team_info.get("id")
-        city = team_info.get("city", "")
-        full_name = team_info.get("name", "")
-        code = team_info.get("code", "")
-        
+@app.get("/search/suggest")
+def suggest_players(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=50)):
+    """
+    球员联想搜索（每次按键都可以调用），完全由本地索引提供，结果包含 nba_official_id
+    """
+    return {"players": player_index.suggest(q, limit)}
+
+def _team_sources(team_info: dict, season: str) -> dict:
+    """
+    球队详情页的各数据源：名称 -> (提供方, 函数, 参数)；缺少参数的数据源会被跳过
+    """
+    team_id = team_info.get("id")
+    city = team_info.get("city", "")
+    full_name = team_info.get("name", "")
+    # 优先使用场馆坐标：三个天气端点可以同时请求
+    arena_location = weather_service.arena_location(team_info.get("code", ""))
+    if arena_location:
+        weather = ("openweathermap", weather_service.get_comprehensive_weather_by_coordinates, arena_location)
+    else:
         # 使用城市映射模块转换城市名，确保与天气API兼容
         weather_city = get_weather_city_name(city)
-        
-        print(f"\n{'='*60}")
-        print(f"[Team Details] Fetching data for: {full_name}")
-        print(f"  - Team ID: {team_id}")
-        print(f"  - Team Code: {code}")
-        print(f"  - Original City: '{city}'")
-        print(f"  - Weather City: '{weather_city}'")
-        print(f"{'='*60}\n")
-
-        # 并发获取数据，确保即使某个API失败也不影响其他
-        results = await asyncio.gather(
-            nba_service.get_team_roster(team_id, season) if team_id else None,
-            news_service.get_news_by_keyword(full_name) if full_name else None,
-            weather_service.get_comprehensive_weather(weather_city) if weather_city else None,  # 使用综合天气API
-            image_service.get_image_url_by_keyword(city) if city else None,
-            return_exceptions=True
+        weather = ("openweathermap", weather_service.get_comprehensive_weather, (weather_city,) if weather_city else None)
+    return {
+        "roster": ("api-sports", nba_service.get_team_roster, (team_id, season) if team_id else None),
+        "news": ("newsapi", news_service.get_news_by_keyword, (full_name,) if full_name else None),
+        "weather": weather,  # 使用综合天气API
+        "image": ("unsplash", image_service.get_image_url_by_keyword, (city,) if city else None),
+    }
+
+
+async def _fetch_team_source(sources: dict, name: str, deadline: float):
+    """
+    获取一个数据源：每个数据源有自己的超时和熔断器，任何一个变慢或出错都不影响其他。
+    返回 (名称, 前端使用的值, 状态)
+    """
+    provider, func, args = sources[name]
+    if args is None:
+        result, status = None, resilience.SKIPPED
+    else:
+        timeout = min(SOURCE_TIMEOUTS[name], deadline - time.monotonic())
+        result, status = await resilience.guarded(provider, func, *args, timeout=timeout)
+    if name == "roster":
+        value = result.get("response", []) if result else []
+    elif name == "news":
+        value = result.get("articles", []) if result else []
+    else:
+        value = result or None
+    return name, value, status
+
+
+def _degraded(source_status: dict) -> list:
+    # 哪些部分因超时、熔断或出错而缺失，前端可以据此提示
+    return [
+        name for name, status in source_status.items()
+        if status not in (resilience.OK, resilience.SKIPPED)
+    ]
+
+
+async def _load_team(team_name: str) -> dict:
+    team_info = await _resolve_team(team_name)
+    if not team_info:
+        raise HTTPException(status_code=404, detail=f"Team '{team_name}' not found")
+
+    logger.info(
+        "Team details: %s (id=%s, code=%s, city=%s)",
+        team_info.get("name", ""), team_info.get("id"), team_info.get("code", ""), team_info.get("city", ""),
+        extra={"team_id": team_info.get("id")}
+    )
+    return team_info
+
+
+def _ndjson_event(event: str, data) -> bytes:
+    return dumps({"event": event, "data": data}) + b"\n"
+
+
+def _ndjson_response(events: AsyncIterator[bytes]) -> StreamingResponse:
+    # 关闭代理缓冲（如 nginx），让每个事件到达后立即发给浏览器
+    return StreamingResponse(events, media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
+
+
+async def _team_details(team_name: str, season: str) -> dict:
+    # 整个请求的时间预算：p99 由我们自己的预算决定，而不是最慢的第三方
+    deadline = time.monotonic() + TEAM_DETAILS_BUDGET
+    team_info = await _load_team(team_name)
+    code = team_info.get("code", "")
+    sources = _team_sources(team_info, season)
+
+    # 并发获取数据
+    results = await asyncio.gather(*(_fetch_team_source(sources, name, deadline) for name in sources))
+    values = {name: value for name, value, _ in results}
+    source_status = {name: status for name, _, status in results}
+
+    return {
+        "team_info": team_info,
+        "city_context": {
+            "weather": values["weather"], 
+            "image_url": values["image"], 
+            "arena_coordinates": get_arena_coordinates(code) if code else None
+        },
+        "roster": values["roster"],
+        "news": values["news"],
+        "sources": source_status,
+        "degraded": _degraded(source_status)
+    }
+
+
+@app.get("/team-details/{team_name}")
+async def get_team_details(
+    request: Request,
+    team_name: str,
+    season: str = Query("2023"),  # 免费 API 支持 2021-2023
+    fields: Optional[str] = Query(None, description=f"{FIELDS_DESCRIPTION}，如 team_info.name,roster.firstname,news.title"),
+    roster_limit: Optional[int] = Query(None, ge=1),
+    roster_offset: int = Query(0, ge=0),
+    news_limit: Optional[int] = Query(None, ge=1),
+    news_offset: int = Query(0, ge=0)
+):
+    fields = _parse_fields(fields)
+    try:
+        # 热点球队直接返回编码好的字节；有数据源降级的结果不缓存，下次请求重新获取
+        payload = await cached_payload(
+            "team-details", (team_name, season),
+            lambda: _team_details(team_name, season),
+            should_cache=lambda data: not data["degraded"],
+            cache_control=lambda data: responses.NO_CACHE if data["degraded"] else responses.LIVE
         )
-        roster_data, news_data, weather_data, image_url = results
-        arena_coords = get_arena_coordinates(code) if code else None
+        if fields is None and roster_limit is None and news_limit is None and not roster_offset and not news_offset:
+            return payload_response(request, payload)
 
-        return {
-            "team_info": team_info,
-            "city_context": {
-                "weather": weather_data if weather_data and not isinstance(weather_data, Exception) else None, 
-                "image_url": image_url if image_url and not isinstance(image_url, Exception) else None, 
-                "arena_coordinates": arena_coords
-            },
-            "roster": roster_data.get("response", []) if roster_data and not isinstance(roster_data, Exception) else [],
-            "news": news_data.get("articles", []) if news_data and not isinstance(news_data, Exception) else []
+        # 在缓存的数据上分页和投影，不重新获取
+        content = payload.content
+        content = {
+            **content,
+            "roster": paginate(content["roster"], roster_offset, roster_limit),
+            "news": paginate(content["news"], news_offset, news_limit),
         }
+        return encoded_response(request, project(content, fields), payload.cache_control)
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error in get_team_details: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Error in get_team_details: %s", e)
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
 
+
+@app.get("/team-details/{team_name}/stream")
+async def stream_team_details(team_name: str, season: str = Query("2023")):
+    """
+    球队详情的流式版本（NDJSON，每行一个 {"event", "data"}）：
+    先发送 team_info 和 arena_coordinates，之后 roster、weather、news、image_url
+    谁先完成谁先发送，最后发送 done（包含 sources 和 degraded）。
+    """
+    deadline = time.monotonic() + TEAM_DETAILS_BUDGET
+    # 球队不存在时在开始输出前返回 404
+    team_info = await _load_team(team_name)
+    code = team_info.get("code", "")
+    sources = _team_sources(team_info, season)
+    event_names = {"image": "image_url"}
+
+    async def events():
+        yield _ndjson_event("team_info", team_info)
+        yield _ndjson_event("arena_coordinates", get_arena_coordinates(code) if code else None)
+        tasks = [asyncio.ensure_future(_fetch_team_source(sources, name, deadline)) for name in sources]
+        source_status = {}
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                name, value, status = await next_done
+                source_status[name] = status
+                yield _ndjson_event(event_names.get(name, name), value)
+        finally:
+            # 客户端中途断开时取消尚未完成的数据源
+            for task in tasks:
+                task.cancel()
+        source_status = {name: source_status[name] for name in sources}
+        yield _ndjson_event("done", {"sources": source_status, "degraded": _degraded(source_status)})
+
+    return _ndjson_response(events())
+
+
+def _player_info_from(player_basic_data) -> dict:
+    """
+    从球员基本信息响应中取出 player_info，并补充 NBA 官方 ID
+    （查询本地索引，调用前先 await player_index.wait_until_ready()）
+    """
+    if isinstance(player_basic_data, Exception) or not player_basic_data.get("response"):
+        logger.warning("Failed to get basic info: %s", player_basic_data if isinstance(player_basic_data, Exception) else "No response")
+        return {}
+    # 复制一份，避免修改缓存中的原始数据（之后会用赛季数据覆盖 team 字段）
+    player_info = dict(player_basic_data["response"][0])
+    logger.debug("Got basic info: %s %s", player_info.get("firstname"), player_info.get("lastname"))
+    # 获取 NBA 官方 ID（通过 nba_api），这个ID可以直接用于构建 NBA.com 的头像 URL
+    if player_info.get("firstname") and player_info.get("lastname"):
+        nba_official_id = get_nba_player_id_by_name(
+            player_info['firstname'], 
+            player_info['lastname']
+        )
+        if nba_official_id:
+            player_info['nba_official_id'] = nba_official_id
+    return player_info
+
+
+def _season_statistics_from(season_stats, season: str):
+    """
+    处理统计数据（由 stats_engine 向量化计算，并按球员+赛季缓存），
+    返回 (场均数据, 该赛季所在球队)
+    """
+    if isinstance(season_stats, Exception):
+        logger.warning("Stats data request failed: %r", season_stats)
+        return {}, None
+    logger.debug("Got stats data: %d games", season_stats["games"])
+    avg_stats = season_stats["statistics"]
+    if avg_stats:
+        logger.debug("Calculated averages: %d games, %s PPG", avg_stats["games_played"], avg_stats["points"])
+    elif season_stats["games"]:
+        logger.info("No valid games found (total_games = 0)")
+    else:
+        logger.info("No game stats available for season %s", season)
+    # 统计数据中的球队更准确，代表该赛季的球队
+    return avg_stats, season_stats["team"]
+
+
+async def _player_news(player_info: dict) -> list:
+    if not (player_info.get("firstname") and player_info.get("lastname")):
+        return []
+    full_name = f"{player_info['firstname']} {player_info['lastname']}"
+    try:
+        news_data = await news_service.get_news_by_keyword(full_name)
+    except rate_limiter.QuotaExceeded as e:
+        logger.info("News skipped: %s", e)
+        return []
+    except Exception as e:
+        # 新闻只是附加信息，NewsAPI 出错不影响球员详情
+        logger.warning("News unavailable for %s: %r", full_name, e)
+        return []
+    return news_data.get("articles", [])
+
+
 @app.get("/player-details/{player_id}")
 async def get_player_details(player_id: int, season: str = Query("2023")):  # 免费 API 支持 2021-2023
     try:
-        print(f"\n=== Fetching player details: player_id={player_id}, season={season} ===")
-        
-        # 核心修复：先并发获取球员基本信息和统计数据
+        logger.info("Player details: player_id=%s, season=%s", player_id, season,
+                    extra={"player_id": player_id, "season": season})
+
+        # 先并发获取球员基本信息和统计数据
         # 这样即使统计数据为空，也能保证球员名字等基本信息正常显示
-        player_basic_info_task = nba_service.get_player_by_id(player_id)
-        player_stats_task = nba_service.get_player_statistics(player_id, season)
-        
-        player_basic_data, player_stats_data = await asyncio.gather(
-            player_basic_info_task, 
-            player_stats_task,
+        player_basic_data, season_stats = await asyncio.gather(
+            nba_service.get_player_by_id(player_id), 
+            stats_engine.get_season_stats(player_id, season),
             return_exceptions=True
         )
         
-        # 初始化返回数据
-        player_info = {}
-        avg_stats = {}
-        
-        # 1. 先处理球员基本信息（优先级最高，确保名字等信息一定能显示）
-        if not isinstance(player_basic_data, Exception) and player_basic_data.get("response"):
-            player_info = player_basic_data["response"][0]
-            print(f"✓ Got basic info for: {player_info.get('firstname')} {player_info.get('lastname')}")
-        else:
-            print(f"✗ Failed to get basic info: {player_basic_data if isinstance(player_basic_data, Exception) else 'No response'}")
+        await player_index.wait_until_ready()
+        player_info = _player_info_from(player_basic_data)
+        avg_stats, season_team = _season_statistics_from(season_stats, season)
+        if season_team:
+            player_info['team'] = season_team
         
-        # 2. 处理统计数据
-        if not isinstance(player_stats_data, Exception):
-            game_stats_list = player_stats_data.get("response", [])
-            print(f"✓ Got stats data: {len(game_stats_list) if game_stats_list else 0} games")
-            
-            # 如果有统计数据，计算平均值
-            if game_stats_list and len(game_stats_list) > 0:
-                total_games, total_points, total_rebounds, total_assists, total_steals, total_blocks = 0, 0, 0, 0, 0, 0
-                
-                # 尝试从统计数据中更新球队信息（因为更准确，代表该赛季的球队）
-                first_game = game_stats_list[0]
-                if first_game.get("team"):
-                    player_info['team'] = first_game["team"]
-                
-                # 计算该赛季平均数据
-                for game in game_stats_list:
-                    try:
-                        # 更健壮的上场时间检查
-                        min_played = game.get("min")
-                        if min_played:
-                            # 尝试转换为整数，如果失败则跳过这场比赛
-                            if isinstance(min_played, str):
-                                # 可能是 "30" 或 "00:30" 格式，取第一个数字部分
-                                min_played = int(min_played.split(":")[0]) if ":" in min_played else int(min_played)
-                            else:
-                                min_played = int(min_played)
-                            
-                            # 只统计上场时间大于0的比赛
-                            if min_played > 0:
-                                total_games += 1
-                                total_points += game.get("points") or 0
-                                total_rebounds += game.get("totReb") or 0
-                                total_assists += game.get("assists") or 0
-                                total_steals += game.get("steals") or 0
-                                total_blocks += game.get("blocks") or 0
-                    except (ValueError, TypeError, AttributeError) as e:
-                        # 某场比赛数据格式异常，跳过该场比赛
-                        print(f"Warning: Skipping game due to data format issue: {e}")
-                        continue
-                
-                if total_games > 0:
-                    avg_stats = {
-                        "games_played": total_games,
-                        "points": round(total_points / total_games, 1),
-                        "rebounds": round(total_rebounds / total_games, 1),
-                        "assists": round(total_assists / total_games, 1),
-                        "steals": round(total_steals / total_games, 1),
-                        "blocks": round(total_blocks / total_games, 1)
-                    }
-                    print(f"✓ Calculated averages: {total_games} games, {avg_stats['points']} PPG")
-                else:
-                    print(f"✗ No valid games found (total_games = 0)")
-            else:
-                print(f"✗ No game stats available for season {season}")
-        else:
-            print(f"✗ Stats data request failed: {player_stats_data}")
-        
-        # 3. 获取 NBA 官方 ID（通过 nba_api）
-        # 这个ID可以直接用于构建 NBA.com 的头像 URL
-        if player_info.get("firstname") and player_info.get("lastname"):
-            nba_official_id = get_nba_player_id_by_name(
-                player_info['firstname'], 
-                player_info['lastname']
-            )
-            if nba_official_id:
-                player_info['nba_official_id'] = nba_official_id
-        
-        # 4. 获取新闻（如果有球员名字的话）
-        news_data = {}
-        if player_info.get("firstname") and player_info.get("lastname"):
-            full_name = f"{player_info['firstname']} {player_info['lastname']}"
-            news_data = await news_service.get_news_by_keyword(full_name)
-        
-        return {
+        return JSONResponse({
             "player_info": player_info,
             "statistics": avg_stats,
-            "news": news_data.get("articles", [])
-        }
+            "news": await _player_news(player_info)
+        })
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Error in get_player_details: %s", e)
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
 
+
+@app.get("/player-details/{player_id}/stream")
+async def stream_player_details(player_id: int, season: str = Query("2023")):
+    """
+    球员详情的流式版本（NDJSON）：player_info、statistics（及该赛季球队 team）、news
+    谁先完成谁先发送；新闻依赖球员姓名，在 player_info 之后立即开始获取。
+    """
+    async def basic_info():
+        try:
+            data = await nba_service.get_player_by_id(player_id)
+        except Exception as e:
+            data = e
+        await player_index.wait_until_ready()
+        return "player_info", _player_info_from(data)
+
+    async def statistics():
+        try:
+            data = await stats_engine.get_season_stats(player_id, season)
+        except Exception as e:
+            data = e
+        return "statistics", _season_statistics_from(data, season)
+
+    async def news(player_info: dict):
+        return "news", await _player_news(player_info)
+
+    async def events():
+        pending = {asyncio.ensure_future(basic_info()), asyncio.ensure_future(statistics())}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name, value = task.result()
+                    if name == "player_info":
+                        yield _ndjson_event("player_info", value)
+                        pending.add(asyncio.ensure_future(news(value)))
+                    elif name == "statistics":
+                        avg_stats, season_team = value
+                        yield _ndjson_event("statistics", avg_stats)
+                        if season_team:
+                            yield _ndjson_event("team", season_team)
+                    else:
+                        yield _ndjson_event(name, value)
+        finally:
+            for task in pending:
+                task.cancel()
+        yield _ndjson_event("done", None)
+
+    return _ndjson_response(events())
+
+@app.get("/weather/arenas")
+async def get_arenas_weather():
+    """
+    一次返回全部 30 个场馆的当前天气（按场馆坐标查询，结果短时间缓存），
+    同时进行的上游请求数受 WEATHER_ARENAS_CONCURRENCY 限制。
+    """
+    semaphore = asyncio.Semaphore(WEATHER_ARENAS_CONCURRENCY)
+
+    async def arena_weather(code: str, arena: dict):
+        async with semaphore:
+            weather, status = await resilience.guarded(
+                "openweathermap", weather_service.get_weather_by_coordinates,
+                arena["coordinates"]["latitude"], arena["coordinates"]["longitude"],
+                timeout=SOURCE_TIMEOUTS["weather"]
+            )
+        return {
+            "team_code": code,
+            "team_name": arena.get("team_name"),
+            "arena_name": arena.get("arena_name"),
+            "coordinates": arena.get("coordinates"),
+            "weather": weather,
+            "status": status
+        }
+
+    arenas = await asyncio.gather(*(
+        arena_weather(team.code, team.arena()) for team in registry.all_teams() if team.location
+    ))
+    return JSONResponse({"count": len(arenas), "arenas": arenas})
+
+def _parse_batch(raw: str, convert=str) -> list:
+    """
+    解析逗号分隔的批量参数：去掉空项、去重并保持顺序
+    """
+    try:
+        items = [convert(item.strip()) for item in raw.split(",") if item.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail=f"Invalid batch parameter: '{raw}'")
+    items = list(dict.fromkeys(items))
+    if not items:
+        raise HTTPException(status_code=422, detail="Batch parameter must not be empty")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=422, detail=f"At most {BATCH_MAX_ITEMS} items per batch")
+    return items
+
+
+def _batch_error(item_key: str, item, e: Exception, part: Optional[str] = None) -> dict:
+    """
+    批量接口中单项失败的记录，状态与 resilience 的一致（quota_exceeded / error）
+    """
+    logger.warning("Batch item %s failed: %r", item, e)
+    status = resilience.QUOTA_EXCEEDED if isinstance(e, rate_limiter.QuotaExceeded) else resilience.ERROR
+    error = {item_key: item, "error": status}
+    if part:
+        error["part"] = part
+    return error
+
+
+async def _bounded_map(func, items: list) -> list:
+    """
+    以有限的并发对每一项调用 func，结果保持原顺序
+    """
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run(item):
+        async with semaphore:
+            return await func(item)
+
+    return await asyncio.gather(*(run(item) for item in items))
+
+
+@app.get("/players/batch")
+async def get_players_batch(
+    ids: str = Query(..., description="逗号分隔的球员ID，例如 265,124"),
+    season: str = Query("2023"),
+    include_news: bool = Query(False)
+):
+    """
+    一次获取多名球员的基本信息和赛季数据（例如整个阵容），
+    重复的 ID 只查询一次，各部分都复用单个详情接口的缓存。
+    新闻每名球员都要单独请求，默认不包含。
+    获取基本信息出错（而不是查无此人）的球员列在 errors 中。
+    """
+    player_ids = _parse_batch(ids, int)
+
+    async def load(player_id: int):
+        player_basic_data, season_stats = await asyncio.gather(
+            nba_service.get_player_by_id(player_id),
+            stats_engine.get_season_stats(player_id, season),
+            return_exceptions=True
+        )
+        if isinstance(player_basic_data, Exception):
+            return {"id": player_id, "error": _batch_error("id", player_id, player_basic_data)}
+        await player_index.wait_until_ready()
+        player_info = _player_info_from(player_basic_data)
+        avg_stats, season_team = _season_statistics_from(season_stats, season)
+        if season_team:
+            player_info['team'] = season_team
+        result = {"id": player_id, "player_info": player_info, "statistics": avg_stats}
+        if include_news:
+            result["news"] = await _player_news(player_info)
+        return result
+
+    players = await _bounded_map(load, player_ids)
+    loaded = [player for player in players if "error" not in player]
+    return JSONResponse({
+        "season": season,
+        "players": [player for player in loaded if player["player_info"]],
+        "not_found": [player["id"] for player in loaded if not player["player_info"]],
+        "errors": [player["error"] for player in players if "error" in player]
+    })
+
+
+@app.get("/teams/batch")
+async def get_teams_batch(
+    names: str = Query(..., description="逗号分隔的球队名称或代码，例如 lakers,BOS"),
+    season: str = Query("2023"),
+    include_roster: bool = Query(False)
+):
+    """
+    一次获取多支球队的基本信息和场馆坐标，可选包含阵容。
+    不同写法指向同一支球队时（如 "lakers" 和 "LAL"）只返回一次。
+    解析或获取阵容时上游出错的项列在 errors 中，不影响其他球队。
+    """
+    team_names = _parse_batch(names)
+    errors = []
+    failed = object()  # 解析出错（区别于查无此队的 None）
+
+    async def resolve(team_name: str):
+        try:
+            return await _resolve_team(team_name)
+        except Exception as e:
+            errors.append(_batch_error("name", team_name, e))
+            return failed
+
+    resolved = await _bounded_map(resolve, team_names)
+
+    teams = {}
+    not_found = []
+    for team_name, team_info in zip(team_names, resolved):
+        if team_info is failed:
+            continue
+        if not team_info:
+            not_found.append(team_name)
+        elif team_info.get("id") not in teams:
+            teams[team_info.get("id")] = team_info
+
+    async def load(team_info: dict):
+        code = team_info.get("code", "")
+        result = {
+            "team_info": team_info,
+            "arena_coordinates": get_arena_coordinates(code) if code else None
+        }
+        if include_roster:
+            try:
+                roster_data = await nba_service.get_team_roster(team_info["id"], season) if team_info.get("id") else None
+            except Exception as e:
+                errors.append(_batch_error("name", team_info.get("name"), e, part="roster"))
+                result["roster"] = None
+            else:
+                result["roster"] = roster_data.get("response", []) if roster_data else []
+        return result
+
+    loaded = await _bounded_map(load, list(teams.values()))
+    return JSONResponse({
+        "season": season,
+        "teams": loaded,
+        "not_found": not_found,
+        "errors": errors
+    })
+
+@app.get("/schedule")
+async def get_schedule_range(
+    request: Request,
+    date_from: str = Query(..., alias="from", description="开始日期 YYYY-MM-DD"),
+    date_to: str = Query(..., alias="to", description="结束日期 YYYY-MM-DD（包含）"),
+    team: Optional[str] = Query(None, description="只返回该球队的比赛（名称、代码或ID）")
+):
+    """
+    获取一段日期内的赛程，按日期分组，一次请求即可显示一周或一个月。
+    每天的数据单独缓存（已结束的日期永久缓存，今天前后很快过期），
+    未缓存的日期以有限的并发同时获取；获取失败的日期列在 unavailable 中。
+    """
+    try:
+        start, end = Date.fromisoformat(date_from), Date.fromisoformat(date_to)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Dates must be in YYYY-MM-DD format")
+    if end < start:
+        raise HTTPException(status_code=422, detail="'to' must not be earlier than 'from'")
+    days = (end - start).days + 1
+    if days > SCHEDULE_MAX_DAYS:
+        raise HTTPException(status_code=422, detail=f"At most {SCHEDULE_MAX_DAYS} days per request")
+
+    team_id = None
+    if team:
+        team_info = await _resolve_team(team) if not team.isdigit() else {"id": int(team)}
+        if not team_info:
+            raise HTTPException(status_code=404, detail=f"Team '{team}' not found")
+        team_id = team_info.get("id")
+
+    dates = [(start + timedelta(days=offset)).isoformat() for offset in range(days)]
+    semaphore = asyncio.Semaphore(SCHEDULE_CONCURRENCY)
+
+    async def games_on(date: str):
+        async with semaphore:
+            try:
+                games_data = await nba_service.get_games_by_date(date)
+            except Exception as e:
+                logger.warning("Schedule unavailable for %s: %r", date, e)
+                return None
+        return games_data.get("response", [])
+
+    results = await asyncio.gather(*(games_on(date) for date in dates))
+
+    def plays(game: dict) -> bool:
+        teams = game.get("teams") or {}
+        return team_id in ((teams.get("home") or {}).get("id"), (teams.get("visitors") or {}).get("id"))
+
+    unavailable = [date for date, games in zip(dates, results) if games is None]
+    if unavailable:
+        policy = responses.NO_CACHE
+    else:
+        policy = responses.HISTORICAL if nba_service.is_completed_date(dates[-1]) else responses.LIVE
+    return encoded_response(request, {
+        "from": dates[0],
+        "to": dates[-1],
+        "dates": {
+            date: [game for game in games if team_id is None or plays(game)]
+            for date, games in zip(dates, results) if games is not None
+        },
+        "unavailable": unavailable
+    }, policy)
+
 # --- 核心修复点：为 get_schedule 添加路由装饰器 ---
 @app.get("/schedule/{date}")
-async def get_schedule(date: str):
+async def get_schedule(request: Request, date: str):
     """
     获取指定日期的比赛赛程。日期格式: YYYY-MM-DD。
+    已经过去的日期不会再变化，浏览器和 CDN 可以长时间缓存。
     """
     try:
         games_data = await nba_service.get_games_by_date(date)
-        return games_data.get("response", [])
+        policy = responses.HISTORICAL if nba_service.is_completed_date(date) else responses.LIVE
+        return encoded_response(request, games_data.get("response", []), policy)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get schedule: {str(e)}")
 # --------------------------------------------------
 
+def _season_cache_control(season: str) -> str:
+    return responses.HISTORICAL if nba_service.is_completed_season(season) else responses.LIVE
+
+
+# /leaders 分页参数的上限；缓存的完整排名包含能请求到的所有名次
+LEADERS_MAX_LIMIT = 100
+LEADERS_MAX_OFFSET = 500
+LEADERS_MAX_RANK = LEADERS_MAX_OFFSET + LEADERS_MAX_LIMIT
+
+
+async def _league_leaders(category: str, season: str, limit: int = 20) -> list:
+    leaders_data = await leaders_service.get_league_leaders_from_nba_api(category, season, limit)
+    
+    # 为每个球员添加 NBA 官方 ID（用于头像），一次批量解析
+    top_players = leaders_data[:limit]
+    await player_index.wait_until_ready()
+    official_ids = player_index.resolve_ids(p["PLAYER"] for p in top_players if p.get("PLAYER"))
+    for player in top_players:
+        nba_official_id = official_ids.get(player.get("PLAYER", ""))
+        if nba_official_id:
+            player["nba_official_id"] = nba_official_id
+    
+    return top_players
+
+
 @app.get("/leaders/{category}")
-async def get_league_leaders(category: str, season: str = Query("2023")):
-    valid_categories = {"points", "rebounds", "assists", "steals", "blocks"}
-    if category.lower() not in valid_categories:
+async def get_league_leaders(
+    request: Request,
+    category: str,
+    # nba_api 需要由起始年份推算 "2023-24" 这样的赛季写法，格式不对直接返回 422
+    season: str = Query("2023", pattern=r"^\d{4}$", description="赛季起始年份，例如 2023"),
+    fields: Optional[str] = Query(None, description=f"{FIELDS_DESCRIPTION}，如 PLAYER,TEAM,PTS,nba_official_id"),
+    limit: int = Query(20, ge=1, le=LEADERS_MAX_LIMIT),
+    offset: int = Query(0, ge=0, le=LEADERS_MAX_OFFSET)
+):
+    valid_categories = leaders_service.CATEGORIES
+    category = category.lower()
+    if category not in valid_categories:
         raise HTTPException(status_code=400, detail=f"Invalid category. Valid categories are: {', '.join(valid_categories)}")
+    fields = _parse_fields(fields)
     try:
-        leaders_data = await leaders_service.get_league_leaders_from_nba_api(category, season)
-        
-        # 为每个球员添加 NBA 官方 ID（用于头像）
-        for player in leaders_data[:20]:
-            player_name = player.get("PLAYER", "")
-            if player_name:
-                # 分割名字（格式通常是 "First Last" 或 "First Middle Last"）
-                name_parts = player_name.split()
-                if len(name_parts) >= 2:
-                    firstname = name_parts[0]
-                    lastname = " ".join(name_parts[1:])  # 处理多个姓氏的情况
-                    nba_official_id = get_nba_player_id_by_name(firstname, lastname)
-                    if nba_official_id:
-                        player["nba_official_id"] = nba_official_id
-        
-        return leaders_data[:20]
+        # 每个 (类别, 赛季) 只缓存一份完整排名，各种 offset/limit 都从中截取，
+        # 缓存条目数不随客户端参数增长；nba_api 调用失败时返回空列表，不缓存
+        payload = await cached_payload(
+            "leaders", (category, season),
+            lambda: _league_leaders(category, season, LEADERS_MAX_RANK),
+            should_cache=bool,
+            cache_control=lambda data: _season_cache_control(season) if data else responses.NO_CACHE
+        )
+        return encoded_response(request, project(paginate(payload.content, offset, limit), fields), payload.cache_control)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get league leaders: {str(e)}")
 
 @app.get("/news/hot")
-async def get_hot_news():
+async def get_hot_news(
+    fields: Optional[str] = Query(None, description=f"{FIELDS_DESCRIPTION}（作用于每篇文章），如 title,url,urlToImage"),
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0)
+):
     """
-    获取NBA热点新闻
+    获取NBA热点新闻，可以只取部分字段并分页
     """
+    fields = _parse_fields(fields)
     try:
         news_data = await news_service.get_news_by_keyword("NBA")
         # 如果没有返回articles，返回空数组
         if not news_data or "articles" not in news_data:
             return {"articles": []}
-        return news_data
+        if fields is None and limit is None and not offset:
+            return JSONResponse(news_data)
+        return JSONResponse({**news_data, "articles": project(paginate(news_data["articles"], offset, limit), fields)})
     except Exception as e:
-        print(f"Error fetching hot news: {e}")
+        logger.warning("Error fetching hot news: %s", e)
         # 返回空数组而不是抛出异常
         return {"articles": []}
 
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """
+    Prometheus 抓取接口（文本格式）
+    """
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE_LATEST)
+
+@app.get("/debug/warmup")
+def debug_warmup():
+    """
+    诊断工具：查看启动预热的进度
+    """
+    return {"enabled": WARMUP_ENABLED, **warmup.status}
+
+@app.get("/debug/startup")
+def debug_startup():
+    """
+    诊断工具：查看各初始化步骤和后台预加载的耗时（秒）
+    """
+    return startup.stats()
+
+@app.get("/debug/executors")
+def debug_executors():
+    """
+    诊断工具：查看阻塞调用线程池的排队深度、运行时间等指标
+    """
+    return executor.all_stats()
+
+@app.get("/debug/rate-limits")
+def debug_rate_limits():
+    """
+    诊断工具：查看各上游提供方的额度使用情况
+    """
+    return rate_limiter.all_stats()
+
+@app.get("/debug/circuit-breakers")
+def debug_circuit_breakers():
+    """
+    诊断工具：查看各上游提供方熔断器的状态
+    """
+    return resilience.all_stats()
+
 @app.get("/debug/weather-mapping")
 async def debug_weather_mapping():
     """
@@ -304,30 +895,36 @@ async def debug_weather_mapping():
         "Dallas Mavericks", "Phoenix Suns", "Denver Nuggets"
     ]
     
+    # 诊断流量优先级最低，不占用为交互请求保留的额度
     results = []
-    for team in test_teams:
-        try:
-            team_data = await nba_service.search_team_by_name(team)
-            if team_data.get("response"):
-                team_info = team_data["response"][0]
-                city = team_info.get("city", "")
-                weather_city = get_weather_city_name(city)
+    with rate_limiter.priority(rate_limiter.Priority.DIAGNOSTIC):
+        for team in test_teams:
+            try:
+                team_data = await nba_service.search_team_by_name(team)
+                if team_data.get("response"):
+                    team_info = team_data["response"][0]
+                    city = team_info.get("city", "")
+                    weather_city = get_weather_city_name(city)
                 
-                # 测试天气API
-                weather_data = await weather_service.get_weather_by_city(weather_city) if weather_city else None
+                    # 测试天气API（上游出错视为不可用）
+                    try:
+                        weather_data = await weather_service.get_weather_by_city(weather_city) if weather_city else None
+                    except Exception as e:
+                        logger.warning("Weather check failed for %s: %r", weather_city, e)
+                        weather_data = None
                 
+                    results.append({
+                        "team": team_info.get("name"),
+                        "original_city": city,
+                        "weather_city": weather_city,
+                        "weather_available": weather_data is not None and not isinstance(weather_data, Exception),
+                        "weather_status": "✓ OK" if (weather_data and not isinstance(weather_data, Exception)) else "✗ Failed"
+                    })
+            except Exception as e:
                 results.append({
-                    "team": team_info.get("name"),
-                    "original_city": city,
-                    "weather_city": weather_city,
-                    "weather_available": weather_data is not None and not isinstance(weather_data, Exception),
-                    "weather_status": "✓ OK" if (weather_data and not isinstance(weather_data, Exception)) else "✗ Failed"
+                    "team": team,
+                    "error": str(e)
                 })
-        except Exception as e:
-            results.append({
-                "team": team,
-                "error": str(e)
-            })
     
     return {
         "total_mappings": len(CITY_WEATHER_MAPPING),
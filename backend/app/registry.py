@@ -0,0 +1,352 @@
+# in backend/app/registry.py
+"""
+球队 / 城市 / 场馆静态注册表。
+
+把分散在 city_mapping（天气城市名）、data_loader（场馆坐标 JSON）
+和 API-Sports 球队数据（ID、城市、昵称）中的信息合并成一份。静态部分导入时构建一次，
+API-Sports 球队数据由 team_directory 拉取后通过 hydrate() 合并进来（随快照一起持久化）。
+所有查询都是预先算好的字典查找（名称统一用 normalize() 规范化）：没有 I/O，也不打印日志。
+"""
+import json
+import os
+import re
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+from app.core.config import REGISTRY_SNAPSHOT_PATH
+
+ARENA_FILE_PATH = os.path.join(os.path.dirname(__file__), 'data', 'arena_coordinates.json')
+
+# 快照格式（TeamRecord 字段）变化时递增，旧快照会被忽略并重建
+SNAPSHOT_VERSION = 3
+
+# 球队代码 -> (API-Sports 使用的城市名, 昵称, OpenWeatherMap 城市查询, 其他别名)
+# API-Sports 的城市名不一定是真实城市（"Golden State"、"Indiana"、"LA"），
+# 天气查询使用场馆所在的城市
+TEAMS: Dict[str, Tuple[str, str, str, Tuple[str, ...]]] = {
+    "ATL": ("Atlanta", "Hawks", "Atlanta,US", ()),
+    "BOS": ("Boston", "Celtics", "Boston,US", ()),
+    "BKN": ("Brooklyn", "Nets", "New York,US", ("BRK",)),  # 布鲁克林使用纽约天气
+    "CHA": ("Charlotte", "Hornets", "Charlotte,US", ("CHO",)),
+    "CHI": ("Chicago", "Bulls", "Chicago,US", ()),
+    "CLE": ("Cleveland", "Cavaliers", "Cleveland,US", ("Cavs",)),
+    "DAL": ("Dallas", "Mavericks", "Dallas,US", ("Mavs",)),
+    "DEN": ("Denver", "Nuggets", "Denver,US", ()),
+    "DET": ("Detroit", "Pistons", "Detroit,US", ()),
+    "GSW": ("Golden State", "Warriors", "San Francisco,US", ("GS",)),
+    "HOU": ("Houston", "Rockets", "Houston,US", ()),
+    "IND": ("Indiana", "Pacers", "Indianapolis,US", ()),
+    "LAC": ("LA", "Clippers", "Los Angeles,US", ("Los Angeles Clippers",)),  # 快船队使用缩写 "LA"
+    "LAL": ("Los Angeles", "Lakers", "Los Angeles,US", ()),
+    "MEM": ("Memphis", "Grizzlies", "Memphis,US", ()),
+    "MIA": ("Miami", "Heat", "Miami,US", ()),
+    "MIL": ("Milwaukee", "Bucks", "Milwaukee,US", ()),
+    "MIN": ("Minnesota", "Timberwolves", "Minneapolis,US", ("Wolves",)),
+    "NOP": ("New Orleans", "Pelicans", "New Orleans,US", ("NO",)),
+    "NYK": ("New York", "Knicks", "New York,US", ("NY",)),
+    "OKC": ("Oklahoma City", "Thunder", "Oklahoma City,US", ()),
+    "ORL": ("Orlando", "Magic", "Orlando,US", ()),
+    "PHI": ("Philadelphia", "76ers", "Philadelphia,US", ("Sixers",)),
+    "PHX": ("Phoenix", "Suns", "Phoenix,US", ("PHO",)),
+    "POR": ("Portland", "Trail Blazers", "Portland,US", ("Blazers",)),
+    "SAC": ("Sacramento", "Kings", "Sacramento,US", ()),
+    "SAS": ("San Antonio", "Spurs", "San Antonio,US", ("SA",)),
+    "TOR": ("Toronto", "Raptors", "Toronto,CA", ()),  # 加拿大多伦多
+    "UTA": ("Utah", "Jazz", "Salt Lake City,US", ("UTAH",)),
+    "WAS": ("Washington", "Wizards", "Washington,US", ("WSH",)),
+}
+
+# 与具体球队无关的城市名/缩写 -> 天气查询
+EXTRA_CITIES: Dict[str, str] = {
+    "San Francisco": "San Francisco,US",
+    "Seattle": "Seattle,US",
+    "Indianapolis": "Indianapolis,US",
+    "Minneapolis": "Minneapolis,US",
+    "Salt Lake City": "Salt Lake City,US",
+    # 城市缩写
+    "SF": "San Francisco,US",
+    "NY": "New York,US",
+    "OKC": "Oklahoma City,US",
+    "SLC": "Salt Lake City,US",
+}
+
+
+class TeamRecord:
+    """
+    一支球队的静态信息
+    """
+    __slots__ = (
+        "code", "name", "nickname", "city", "weather_query",
+        "latitude", "longitude", "arena_name", "address", "aliases",
+        "api_id", "api_team",
+    )
+
+    def __init__(self, code: str, name: str, nickname: str, city: str, weather_query: str,
+                 latitude: Optional[float], longitude: Optional[float],
+                 arena_name: Optional[str], address: Optional[str], aliases: Tuple[str, ...],
+                 api_id: Optional[int] = None, api_team: Optional[dict] = None):
+        self.code = code
+        self.name = name
+        self.nickname = nickname
+        self.city = city
+        self.weather_query = weather_query
+        self.latitude = latitude
+        self.longitude = longitude
+        self.arena_name = arena_name
+        self.address = address
+        self.aliases = aliases
+        # API-Sports 球队 ID 和原始球队数据，hydrate() 之前为 None
+        self.api_id = api_id
+        self.api_team = api_team
+
+    @property
+    def location(self) -> Optional[Tuple[float, float]]:
+        if self.latitude is None or self.longitude is None:
+            return None
+        return self.latitude, self.longitude
+
+    def arena(self) -> Optional[dict]:
+        """
+        与 arena_coordinates.json 中相同结构的场馆信息
+        """
+        if self.arena_name is None:
+            return None
+        return {
+            "team_name": self.name,
+            "arena_name": self.arena_name,
+            "address": self.address,
+            "coordinates": {"longitude": self.longitude, "latitude": self.latitude},
+        }
+
+    def __repr__(self):
+        return f"TeamRecord({self.code!r}, {self.name!r})"
+
+
+# 球队代码 -> 记录（保持 TEAMS 中的顺序）
+_by_code: Dict[str, TeamRecord] = {}
+# 规范化后的代码/全名/昵称/别名 -> 记录
+_by_name: Dict[str, TeamRecord] = {}
+# 单词前缀 (edge n-gram) -> 记录代码集合，例如 "gol" -> {"GSW"}
+_prefix_index: Dict[str, Set[str]] = {}
+# 规范化后的完整名称（代码/全名/昵称/城市/别名）-> 记录代码集合，用于搜索结果排序
+_exact_index: Dict[str, Set[str]] = {}
+# 城市名（原始写法）-> 天气查询
+_weather_cities: Dict[str, str] = {}
+# 规范化后的城市名 -> 天气查询
+_weather_by_city: Dict[str, str] = {}
+# 场馆信息字典，预先构建好，get_arena 直接返回
+_arenas: Dict[str, dict] = {}
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: Optional[str]) -> str:
+    """
+    名称规范化：casefold，非字母数字字符视为分隔符，合并空白
+    """
+    return " ".join(_NON_ALNUM.sub(" ", (text or "").casefold()).split())
+
+
+def _searchable_names(record: TeamRecord) -> List[str]:
+    return [record.code, record.name, record.nickname, record.city, *record.aliases]
+
+
+def _build_records() -> List[TeamRecord]:
+    try:
+        with open(ARENA_FILE_PATH, 'r') as f:
+            arenas = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        arenas = {}
+
+    records = []
+    for code, (city, nickname, weather_query, aliases) in TEAMS.items():
+        arena = arenas.get(code, {})
+        coordinates = arena.get("coordinates") or {}
+        records.append(TeamRecord(
+            code=code,
+            name=arena.get("team_name") or f"{city} {nickname}",
+            nickname=nickname,
+            city=city,
+            weather_query=weather_query,
+            latitude=coordinates.get("latitude"),
+            longitude=coordinates.get("longitude"),
+            arena_name=arena.get("arena_name"),
+            address=arena.get("address"),
+            aliases=aliases,
+        ))
+    return records
+
+
+def _source_signature() -> list:
+    # 场馆数据文件、球队表或快照格式变化时快照失效（用列表，与从 JSON 读回的值直接比较）
+    teams_checksum = zlib.crc32(repr(TEAMS).encode("utf-8"))
+    try:
+        stat = os.stat(ARENA_FILE_PATH)
+        return [SNAPSHOT_VERSION, teams_checksum, stat.st_mtime_ns, stat.st_size]
+    except OSError:
+        return [SNAPSHOT_VERSION, teams_checksum, None, None]
+
+
+def _load_snapshot(signature: list) -> Optional[List[TeamRecord]]:
+    # 快照是纯数据（JSON），只用来重建 TeamRecord，不会执行文件中的任何内容；
+    # 格式不对时当作没有快照
+    try:
+        with open(REGISTRY_SNAPSHOT_PATH, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        if snapshot["signature"] != signature:
+            return None
+        return [
+            TeamRecord(**{**fields, "aliases": tuple(fields["aliases"])})
+            for fields in snapshot["records"]
+        ]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _save_snapshot(signature: list, records: List[TeamRecord]):
+    snapshot = {
+        "signature": signature,
+        "records": [{name: getattr(record, name) for name in TeamRecord.__slots__} for record in records],
+    }
+    try:
+        os.makedirs(os.path.dirname(REGISTRY_SNAPSHOT_PATH), exist_ok=True)
+        tmp_path = f"{REGISTRY_SNAPSHOT_PATH}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, REGISTRY_SNAPSHOT_PATH)
+    except OSError:
+        pass  # 快照只是启动加速，写不了就每次重新构建
+
+
+def load():
+    """
+    构建注册表：优先读取 JSON 快照，否则从源数据构建（并写出快照）
+    """
+    if REGISTRY_SNAPSHOT_PATH:
+        signature = _source_signature()
+        records = _load_snapshot(signature)
+        if records is None:
+            records = _build_records()
+            _save_snapshot(signature, records)
+    else:
+        records = _build_records()
+
+    _by_code.clear()
+    _by_name.clear()
+    _prefix_index.clear()
+    _exact_index.clear()
+    _weather_cities.clear()
+    _weather_by_city.clear()
+    _arenas.clear()
+    for record in records:
+        _by_code[record.code] = record
+        for name in (record.code, record.name, record.nickname, *record.aliases):
+            _by_name.setdefault(normalize(name), record)
+        for name in _searchable_names(record):
+            normalized = normalize(name)
+            if not normalized:
+                continue
+            _exact_index.setdefault(normalized, set()).add(record.code)
+            for token in normalized.split():
+                for end in range(1, len(token) + 1):
+                    _prefix_index.setdefault(token[:end], set()).add(record.code)
+        _weather_cities.setdefault(record.city, record.weather_query)
+        arena = record.arena()
+        if arena:
+            _arenas[record.code] = arena
+    for city, weather_query in EXTRA_CITIES.items():
+        _weather_cities.setdefault(city, weather_query)
+    for city, weather_query in _weather_cities.items():
+        _weather_by_city.setdefault(normalize(city), weather_query)
+
+
+def hydrate(api_teams: List[dict]) -> int:
+    """
+    把 API-Sports 球队数据合并到对应的记录中（按代码匹配，其次按名称），
+    并写出快照，下次启动不必重新拉取。返回合并的球队数量
+    """
+    hydrated = 0
+    for team in api_teams:
+        record = get_team(team.get("code") or "") or find_team(team.get("name") or "")
+        if record is None or team.get("id") is None:
+            continue
+        record.api_id = team["id"]
+        record.api_team = team
+        hydrated += 1
+    if hydrated and REGISTRY_SNAPSHOT_PATH:
+        _save_snapshot(_source_signature(), all_teams())
+    return hydrated
+
+
+def is_hydrated() -> bool:
+    return any(record.api_team for record in _by_code.values())
+
+
+def all_teams() -> List[TeamRecord]:
+    return list(_by_code.values())
+
+
+def get_team(code: str) -> Optional[TeamRecord]:
+    """
+    通过球队代码 (e.g., 'LAL') 获取球队记录
+    """
+    return _by_code.get(code.upper()) if code else None
+
+
+def find_team(name: str) -> Optional[TeamRecord]:
+    """
+    通过代码、全名、昵称或别名查找球队（不区分大小写）
+    """
+    return _by_name.get(normalize(name)) if name else None
+
+
+def search(query: str) -> List[TeamRecord]:
+    """
+    按全称、昵称、城市、代码、别名以及它们的前缀搜索球队，
+    例如 "lakers"、"LAL"、"golden"、"los ang"；完全匹配的排在前面
+    """
+    normalized = normalize(query)
+    if not normalized:
+        return []
+
+    candidates: Optional[Set[str]] = None
+    for token in normalized.split():
+        matches = _prefix_index.get(token, set())
+        candidates = matches if candidates is None else candidates & matches
+        if not candidates:
+            return []
+
+    exact = _exact_index.get(normalized, set())
+
+    def rank(code: str):
+        record = _by_code[code]
+        starts = any(normalize(name).startswith(normalized) for name in _searchable_names(record))
+        return (code not in exact, not starts, record.name)
+
+    return [_by_code[code] for code in sorted(candidates, key=rank)]
+
+
+def get_arena(code: str) -> Optional[dict]:
+    """
+    通过球队代码获取场馆信息（名称、地址、坐标）
+    """
+    return _arenas.get(code.upper()) if code else None
+
+
+def weather_cities() -> Dict[str, str]:
+    """
+    城市名（API-Sports 写法和常见缩写，原始大小写）-> 天气查询
+    """
+    return dict(_weather_cities)
+
+
+def weather_query_for_city(city: str) -> Optional[str]:
+    """
+    将城市名（API-Sports 的写法或常见缩写）转换为 OpenWeatherMap 查询，
+    未知城市默认添加 ,US 后缀
+    """
+    if not city or not city.strip():
+        return None
+    return _weather_by_city.get(normalize(city)) or f"{city.strip()},US"
+
+
+load()
@@ -1,8 +1,13 @@
-import httpx
-from app.core.config import UNSPLASH_API_KEY
+from app.core.config import UNSPLASH_API_KEY, UNSPLASH_API_URL, CACHE_IMAGE_TTL
+from app.core.cache import cached
+from app.core.http_client import get_client, register_upstream
+from app.core.singleflight import coalesced
 
-API_URL = "https://api.unsplash.com/search/photos"
+API_URL = f"{UNSPLASH_API_URL}/search/photos"
+register_upstream(API_URL, "unsplash")
 
+@cached("images", CACHE_IMAGE_TTL, should_cache=bool)
+@coalesced("images")
 async def get_image_url_by_keyword(keyword: str):
     """
     根据关键词从Unsplash获取一张高质量图片的URL
@@ -10,24 +15,21 @@ async def get_image_url_by_keyword(keyword: str):
     if not UNSPLASH_API_KEY:
         return None
 
-    async with httpx.AsyncClient() as client:
-        headers = {"Authorization": f"Client-ID {UNSPLASH_API_KEY}"}
-        params = {
-            "query": f"{keyword} city", # 优化搜索词，增加"city"提高相关性
-            "per_page": 1,
-            "orientation": "landscape" # 获取横向图片，更适合做背景
-        }
-        
-        try:
-            response = await client.get(API_URL, headers=headers, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            # 从返回结果中提取图片的URL
-            if data and data.get("results"):
-                # 我们选择 regular 尺寸的图片，大小适中
-                return data["results"][0]["urls"]["regular"]
-            return None
-        except httpx.HTTPStatusError as e:
-            print(f"Unsplash API error: {e}")
-            return None
\ No newline at end of file
+    client = get_client(API_URL)
+    headers = {"Authorization": f"Client-ID {UNSPLASH_API_KEY}"}
+    params = {
+        "query": f"{keyword} city", # 优化搜索词，增加"city"提高相关性
+        "per_page": 1,
+        "orientation": "landscape" # 获取横向图片，更适合做背景
+    }
+
+    # 上游出错直接抛出，由调用方的熔断器计为失败
+    response = await client.get(API_URL, headers=headers, params=params)
+    response.raise_for_status()
+    data = response.json()
+
+    # 从返回结果中提取图片的URL
+    if data and data.get("results"):
+        # 我们选择 regular 尺寸的图片，大小适中
+        return data["results"][0]["urls"]["regular"]
+    return None
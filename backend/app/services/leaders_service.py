@@ -1,103 +1,166 @@
 import asyncio
-from nba_api.stats.endpoints import leagueleaders
-from nba_api.stats.static import players
-from cachetools import TTLCache
-import pandas as pd
-import httpx
+import logging
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from app.core import metrics
+from app.core.cache import cached, FOREVER
+from app.core.config import NBA_API_MAX_WORKERS, NBA_API_MAX_QUEUE, NBA_API_TIMEOUT, NBA_STATS_URL
+from app.core.executor import get_executor, ExecutorSaturated
+from app.core.singleflight import coalesced
+from app.services.nba_service import is_completed_season
 
-# 同样为榜单数据创建一个缓存
-leaders_cache = TTLCache(maxsize=10, ttl=3600) # 缓存1小时
+if TYPE_CHECKING:
+    import numpy as np
 
-# 球员ID缓存（永久缓存，因为球员ID不会变）
-player_id_cache = {}
+logger = logging.getLogger(__name__)
 
-# API-Sports ID 缓存（NBA官方ID -> API-Sports ID）
-api_sports_id_cache = {}
+# nba_api 是同步库，所有调用都放到这个专用的有界线程池中执行
+nba_api_executor = get_executor(
+    "nba_api", NBA_API_MAX_WORKERS, NBA_API_MAX_QUEUE, default_timeout=NBA_API_TIMEOUT
+)
 
-def get_nba_player_id_by_name(firstname: str, lastname: str):
+# 榜单缓存：已结束赛季永久缓存（内存 + 磁盘），进行中的赛季缓存1小时
+LEADERS_TTL = 3600
+
+# 榜单类别 -> (nba_api 场均数据表中的列, 上榜门槛)
+# 门槛为 (命中数列, 赛季总命中数下限)，参照 NBA 官方命中率榜的资格要求
+CATEGORIES: Dict[str, Tuple[str, Optional[Tuple[str, int]]]] = {
+    "points": ("PTS", None),
+    "rebounds": ("REB", None),
+    "assists": ("AST", None),
+    "steals": ("STL", None),
+    "blocks": ("BLK", None),
+    "minutes": ("MIN", None),
+    "fg_pct": ("FG_PCT", ("FGM", 300)),
+    "three_pct": ("FG3_PCT", ("FG3M", 82)),
+    "ft_pct": ("FT_PCT", ("FTM", 125)),
+    "efficiency": ("EFF", None),
+}
+
+# 赛季 -> 列式表；与缓存中的原始数据一一对应，原始数据过期重新获取后自动重建
+_tables: Dict[str, "LeadersTable"] = {}
+
+
+def _leagueleaders():
     """
-    通过球员姓名获取 NBA 官方 ID
-    这个 ID 可以直接用于构建 NBA.com 的头像 URL
-    
-    Args:
-        firstname: 球员名字
-        lastname: 球员姓氏
-        
-    Returns:
-        NBA 官方球员 ID，如果找不到返回 None
+    延迟导入 nba_api 的 endpoints 包：它会导入 pandas 和全部端点模块（约 0.5 秒），
+    只在第一次获取榜单时（或服务就绪后的后台预加载中）付出这个代价，不拖慢 worker 启动
     """
-    cache_key = f"{firstname}_{lastname}"
-    
-    # 检查缓存
-    if cache_key in player_id_cache:
-        return player_id_cache[cache_key]
-    
-    try:
-        # 获取所有球员列表（这个操作很快，nba_api 会缓存）
-        all_players = players.get_players()
-        
-        # 搜索匹配的球员（不区分大小写）
-        for player in all_players:
-            if (player['first_name'].lower() == firstname.lower() and 
-                player['last_name'].lower() == lastname.lower()):
-                player_id = player['id']
-                # 缓存结果
-                player_id_cache[cache_key] = player_id
-                print(f"✓ Found NBA official ID for {firstname} {lastname}: {player_id}")
-                return player_id
-        
-        print(f"✗ No NBA official ID found for {firstname} {lastname}")
-        return None
-    except Exception as e:
-        print(f"Error searching for player {firstname} {lastname}: {e}")
-        return None
+    from nba_api.stats.endpoints import leagueleaders
+    from nba_api.stats.library.http import NBAStatsHTTP
+
+    # 可选：让 nba_api 请求其他地址（例如基准测试的模拟服务）
+    if NBA_STATS_URL:
+        NBAStatsHTTP.base_url = NBA_STATS_URL.rstrip("/") + "/stats/{endpoint}"
+    return leagueleaders
+
 
-def get_leaders_sync(category: str, season: str):
+class LeadersTable:
+    """
+    某个赛季全部球员的场均数据，按列存储（每列一个 NumPy 数组），
+    任意类别的排行榜都只需在本地做一次 top-k 排序。
+    """
+
+    def __init__(self, headers: List[str], rows: List[list]):
+        import numpy as np  # 延迟导入，见 _leagueleaders
+
+        self.headers = headers
+        self.rows = rows
+        self.columns: Dict[str, "np.ndarray"] = {}
+        for name, values in zip(headers, zip(*rows) if rows else [()] * len(headers)):
+            try:
+                self.columns[name] = np.array(
+                    [np.nan if v is None else v for v in values], dtype=np.float64
+                )
+            except (TypeError, ValueError):
+                pass  # 非数值列（球员名、球队名）不参与排序
+
+    def __len__(self):
+        return len(self.rows)
+
+    def top(self, category: str, limit: int = 20) -> List[dict]:
+        import numpy as np
+
+        column, qualifier = CATEGORIES[category]
+        values = self.columns.get(column)
+        if values is None or not len(values):
+            return []
+        values = np.nan_to_num(values, nan=-np.inf)
+        if qualifier:
+            made_column, minimum = qualifier
+            made = self.columns[made_column] * self.columns["GP"]
+            values = np.where(made >= minimum, values, -np.inf)
+        eligible = int(np.isfinite(values).sum())
+        order = np.argsort(-values, kind="stable")[:min(limit, eligible)]
+        return [
+            {**dict(zip(self.headers, self.rows[i])), "RANK": rank}
+            for rank, i in enumerate(order, start=1)
+        ]
+
+
+def _leaders_ttl(season: str) -> float:
+    return FOREVER if is_completed_season(season) else LEADERS_TTL
+
+
+def get_leaders_sync(season: str):
     """
     这是一个同步函数，它会执行耗时的API调用。
+    一次取回整个赛季所有球员的场均数据表 {"headers": [...], "rows": [[...]]}，
+    各类别榜单都从这张表在本地计算。
     """
-    print(f"正在从nba_api获取 {season} 赛季 {category} 榜单...")
-    # nba_api的category需要首字母大写
-    category_map = {
-        "points": "PTS",
-        "rebounds": "REB",
-        "assists": "AST",
-        "steals": "STL",
-        "blocks": "BLK",
-    }
-    
+    logger.info("正在从nba_api获取 %s 赛季场均数据表...", season)
     # 确保我们使用的是nba_api期望的赛季格式，例如 '2023-24'
     season_formatted = f"{season}-{str(int(season) + 1)[-2:]}"
 
+    started_at = time.monotonic()
     try:
-        leaders = leagueleaders.LeagueLeaders(
+        leaders = _leagueleaders().LeagueLeaders(
             season=season_formatted,
             per_mode48="PerGame",
-            stat_category_abbreviation=category_map.get(category.lower(), "PTS")
+            stat_category_abbreviation="PTS",
+            timeout=NBA_API_TIMEOUT
         )
-        # 将结果转换为更易于处理的 a list of dictionaries
-        df = leaders.get_data_frames()[0]
-        return df.to_dict('records')
+        # 直接使用原始表格数据，不经过 DataFrame 转换
+        data = leaders.league_leaders.get_dict()
+        metrics.observe_upstream("nba_api", "leagueleaders", "ok", time.monotonic() - started_at)
+        return {"headers": data["headers"], "rows": data["data"]}
     except Exception as e:
-        print(f"nba_api调用失败: {e}")
-        return []
+        metrics.observe_upstream("nba_api", "leagueleaders", "error", time.monotonic() - started_at)
+        logger.warning("nba_api调用失败: %s", e)
+        return {}
+
+
+def _has_rows(data: dict) -> bool:
+    return bool(data.get("rows"))
+
+
+@cached("leaders.season", _leaders_ttl, should_cache=_has_rows)
+@coalesced("leaders.season")
+async def get_season_leaders_data(season: str):
+    """
+    获取某个赛季的场均数据表（每个赛季只请求一次 nba_api），
+    nba_api 调用失败返回的空结果不会被缓存。
+    """
+    # 在专用线程池中运行同步函数，防止阻塞事件循环，并受截止时间约束
+    try:
+        return await nba_api_executor.run(get_leaders_sync, season)
+    except (asyncio.TimeoutError, ExecutorSaturated) as e:
+        logger.warning("nba_api调用未完成 (%s): %r", season, e)
+        return {}
+
+
+async def get_leaders_table(season: str) -> LeadersTable:
+    data = await get_season_leaders_data(season)
+    table = _tables.get(season)
+    if table is None or table.rows is not data.get("rows"):
+        table = LeadersTable(data.get("headers", []), data.get("rows", []))
+        _tables[season] = table
+    return table
+
 
-async def get_league_leaders_from_nba_api(category: str, season: str):
+async def get_league_leaders_from_nba_api(category: str, season: str, limit: int = 20):
     """
     这是我们将从main.py调用的异步函数。
     """
-    cache_key = f"leaders_{season}_{category}"
-    if cache_key in leaders_cache:
-        print(f"从缓存中获取榜单: {cache_key}")
-        return leaders_cache[cache_key]
-
-    # 在异步应用中调用同步代码的最佳方式是使用 run_in_executor
-    loop = asyncio.get_running_loop()
-    # 这会在一个单独的线程中运行同步函数，防止阻塞
-    result = await loop.run_in_executor(
-        None, get_leaders_sync, category, season
-    )
-    
-    leaders_cache[cache_key] = result
-    print(f"已获取并缓存榜单数据: {cache_key}")
-    return result
\ No newline at end of file
+    table = await get_leaders_table(season)
+    return table.top(category.lower(), limit)
@@ -1,49 +1,125 @@
-import httpx
-from app.core.config import NBA_API_KEY
+from datetime import date as Date, datetime, timedelta, timezone
+from app.core.config import NBA_API_KEY, API_SPORTS_URL, CACHE_DEFAULT_TTL, CACHE_LIVE_TTL
+from app.core.http_client import get_client, register_upstream
+from app.core.cache import cached, FOREVER
+from app.core.singleflight import coalesced
 
-API_URL = "https://v2.nba.api-sports.io"
+API_URL = API_SPORTS_URL
 HEADERS = {
     "x-apisports-key": NBA_API_KEY
 }
+register_upstream(API_URL, "api-sports")
 
+# --- 缓存策略 ---
+
+def _is_valid_response(data) -> bool:
+    """
+    API-Sports 在额度用完等情况下仍返回 200，但 errors 字段非空，这种结果不缓存
+    """
+    return isinstance(data, dict) and not data.get("errors")
+
+def is_completed_season(season) -> bool:
+    """
+    赛季 "2023" 指 2023-24 赛季，次年 7 月之前已全部结束，数据不会再变
+    """
+    try:
+        year = int(season)
+    except (TypeError, ValueError):
+        return False
+    return datetime.now(timezone.utc).date() >= Date(year + 1, 7, 1)
+
+def _season_ttl(season) -> float:
+    return FOREVER if is_completed_season(season) else CACHE_DEFAULT_TTL
+
+def _roster_ttl(team_id, season) -> float:
+    return _season_ttl(season)
+
+def _statistics_ttl(player_id, season) -> float:
+    return _season_ttl(season)
+
+def is_completed_date(date: str) -> bool:
+    """
+    比赛日期早于 UTC 昨天（考虑美国时区），当天的比赛都已结束，数据不会再变
+    """
+    try:
+        day = Date.fromisoformat(date)
+    except (TypeError, ValueError):
+        return False
+    return day < datetime.now(timezone.utc).date() - timedelta(days=1)
+
+def _games_ttl(date: str) -> float:
+    """
+    已经结束的日期永久缓存；今天前后一天（考虑时区）可能有进行中的比赛，很快过期
+    """
+    try:
+        day = Date.fromisoformat(date)
+    except (TypeError, ValueError):
+        return 0
+    today = datetime.now(timezone.utc).date()
+    if is_completed_date(date):
+        return FOREVER
+    if day <= today + timedelta(days=1):
+        return CACHE_LIVE_TTL
+    return CACHE_DEFAULT_TTL
+
+@cached("teams", CACHE_DEFAULT_TTL, should_cache=_is_valid_response)
+@coalesced("teams")
 async def search_team_by_name(name: str):
     """
     根据球队名称搜索球队信息
     """
-    # 使用 httpx 异步发送 GET 请求
-    async with httpx.AsyncClient() as client:
-        # 准备请求参数
-        params = {"search": name}
-        
-        # 发送请求
-        response = await client.get(f"{API_URL}/teams", headers=HEADERS, params=params)
-        
-        # 检查响应状态码，如果不是2xx，则会抛出异常
-        response.raise_for_status()
-        
-        # 返回JSON格式的响应数据
-        return response.json()
-    
+    # 使用共享的长连接客户端异步发送 GET 请求
+    client = get_client(API_URL)
+
+    # 准备请求参数
+    params = {"search": name}
+
+    # 发送请求
+    response = await client.get(f"{API_URL}/teams", headers=HEADERS, params=params)
+
+    # 检查响应状态码，如果不是2xx，则会抛出异常
+    response.raise_for_status()
+
+    # 返回JSON格式的响应数据
+    return response.json()
+
+@cached("teams.all", CACHE_DEFAULT_TTL, should_cache=_is_valid_response)
+@coalesced("teams.all")
+async def get_all_teams():
+    """
+    获取全部球队（包含非 NBA 球队和全明星队，由调用方过滤）
+    """
+    client = get_client(API_URL)
+    response = await client.get(f"{API_URL}/teams", headers=HEADERS)
+    response.raise_for_status()
+    return response.json()
+
+@cached("players.search", CACHE_DEFAULT_TTL, should_cache=_is_valid_response)
+@coalesced("players.search")
 async def search_player_by_name(name: str):
     """
     根据球员名称模糊搜索球员列表
     """
-    async with httpx.AsyncClient() as client:
-        params = {"search": name}
-        response = await client.get(f"{API_URL}/players", headers=HEADERS, params=params)
-        response.raise_for_status()
-        return response.json()
+    client = get_client(API_URL)
+    params = {"search": name}
+    response = await client.get(f"{API_URL}/players", headers=HEADERS, params=params)
+    response.raise_for_status()
+    return response.json()
 
+@cached("players.id", CACHE_DEFAULT_TTL, should_cache=_is_valid_response)
+@coalesced("players.id")
 async def get_player_by_id(player_id: int):
     """
     根据球员ID获取球员信息
     """
-    async with httpx.AsyncClient() as client:
-        params = {"id": player_id}
-        response = await client.get(f"{API_URL}/players", headers=HEADERS, params=params)
-        response.raise_for_status()
-        return response.json()
-    
+    client = get_client(API_URL)
+    params = {"id": player_id}
+    response = await client.get(f"{API_URL}/players", headers=HEADERS, params=params)
+    response.raise_for_status()
+    return response.json()
+
+@cached("players.statistics", _statistics_ttl, should_cache=_is_valid_response)
+@coalesced("players.statistics")
 async def get_player_statistics(player_id: int, season: str):
     """
     获取单个球员的统计数据。
@@ -51,42 +127,47 @@ async def get_player_statistics(player_id: int, season: str):
     - 如果 season 参数为 "all" 或 None，则不传递 season 参数给API，
       从而获取该球员所有赛季的比赛数据。
     """
-    async with httpx.AsyncClient() as client:
-        # 基础参数
-        params = {"id": player_id}
-        
-        # 关键逻辑：条件性地添加 season 参数
-        # 只有当 season 存在且不等于 "all" 时，才将其加入到请求参数中
-        if season and season.lower() != "all":
-            params["season"] = season
-        
-        # 发送请求
-        # 此时的 params 可能是 {"id": 123} 或 {"id": 123, "season": "2023"}
-        response = await client.get(f"{API_URL}/players/statistics", headers=HEADERS, params=params)
-        
-        # 检查响应状态
-        response.raise_for_status()
-        
-        # 返回JSON数据
-        return response.json()
-    
+    client = get_client(API_URL)
+
+    # 基础参数
+    params = {"id": player_id}
+
+    # 关键逻辑：条件性地添加 season 参数
+    # 只有当 season 存在且不等于 "all" 时，才将其加入到请求参数中
+    if season and season.lower() != "all":
+        params["season"] = season
+
+    # 发送请求
+    # 此时的 params 可能是 {"id": 123} 或 {"id": 123, "season": "2023"}
+    response = await client.get(f"{API_URL}/players/statistics", headers=HEADERS, params=params)
+
+    # 检查响应状态
+    response.raise_for_status()
+
+    # 返回JSON数据
+    return response.json()
+
+@cached("players.roster", _roster_ttl, should_cache=_is_valid_response)
+@coalesced("players.roster")
 async def get_team_roster(team_id: int, season: str):
     """
     获取单个球队在特定赛季的球员名单
     """
-    async with httpx.AsyncClient() as client:
-        params = {"team": team_id, "season": season}
-        response = await client.get(f"{API_URL}/players", headers=HEADERS, params=params)
-        response.raise_for_status()
-        return response.json()
-    
+    client = get_client(API_URL)
+    params = {"team": team_id, "season": season}
+    response = await client.get(f"{API_URL}/players", headers=HEADERS, params=params)
+    response.raise_for_status()
+    return response.json()
+
+@cached("games", _games_ttl, should_cache=_is_valid_response)
+@coalesced("games")
 async def get_games_by_date(date: str):
     """
     获取指定日期的所有比赛
     """
-    async with httpx.AsyncClient() as client:
-        params = {"date": date}
-        response = await client.get(f"{API_URL}/games", headers=HEADERS, params=params)
-        response.raise_for_status()
-        return response.json()
+    client = get_client(API_URL)
+    params = {"date": date}
+    response = await client.get(f"{API_URL}/games", headers=HEADERS, params=params)
+    response.raise_for_status()
+    return response.json()
 
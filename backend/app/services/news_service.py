@@ -1,8 +1,17 @@
-import httpx
-from app.core.config import NEWS_API_KEY
+from app.core.config import NEWS_API_KEY, NEWS_API_URL, CACHE_NEWS_TTL
+from app.core.cache import cached
+from app.core.http_client import get_client, register_upstream
+from app.core.singleflight import coalesced
 
-API_URL = "https://newsapi.org/v2/everything"
+API_URL = f"{NEWS_API_URL}/v2/everything"
+register_upstream(API_URL, "newsapi")
 
+def _has_articles(data) -> bool:
+    # 没有配置 API Key 时返回的空列表不缓存
+    return bool(data and data.get("articles"))
+
+@cached("news", CACHE_NEWS_TTL, should_cache=_has_articles)
+@coalesced("news")
 async def get_news_by_keyword(keyword: str, page_size: int = 10):
     """
     根据关键词搜索新闻文章
@@ -11,20 +20,17 @@ async def get_news_by_keyword(keyword: str, page_size: int = 10):
     if not NEWS_API_KEY:
         return {"articles": []}
 
-    async with httpx.AsyncClient() as client:
-        # 准备请求参数
-        params = {
-            "q": keyword,
-            "pageSize": page_size,
-            "apiKey": NEWS_API_KEY,
-            "language": "en" # 可以限定语言为英语
-        }
-        
-        try:
-            response = await client.get(API_URL, params=params)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            # 如果API返回错误（比如额度用完），打印错误并返回空列表
-            print(f"NewsAPI error: {e}")
-            return {"articles": []}
\ No newline at end of file
+    client = get_client(API_URL)
+
+    # 准备请求参数
+    params = {
+        "q": keyword,
+        "pageSize": page_size,
+        "apiKey": NEWS_API_KEY,
+        "language": "en" # 可以限定语言为英语
+    }
+
+    # 上游出错（比如额度用完）直接抛出，由调用方的熔断器计为失败
+    response = await client.get(API_URL, params=params)
+    response.raise_for_status()
+    return response.json()
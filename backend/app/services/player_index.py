@@ -0,0 +1,262 @@
+import asyncio
+import heapq
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from nba_api.stats.static import players
+from app.core import metrics
+from app.core.cache import FOREVER
+from app.core.cache_backend import MemoryBackend
+from app.core.config import PLAYER_ID_CACHE_MAX_ENTRIES
+
+logger = logging.getLogger(__name__)
+
+# 名字后缀：API-Sports 和 nba_api 对 "Jr." / "III" 的写法经常不一致
+NAME_SUFFIXES = {"jr", "sr", "ii", "iii", "iv", "v"}
+
+_DROP_CHARS = re.compile(r"['’.]")
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+# 规范化姓名 -> NBA 官方 ID（完整姓名，保留后缀）
+_exact_index: Dict[str, int] = {}
+# 规范化姓名（去掉后缀） -> NBA 官方 ID
+_base_index: Dict[str, int] = {}
+# 规范化姓氏 -> [(规范化名字, NBA 官方 ID)]，用于 "Nic" / "Nicolas" 这类名字简写
+_last_name_index: Dict[str, List[Tuple[str, int]]] = {}
+# NBA 官方 ID -> 是否现役，同名时优先现役球员
+_is_active: Dict[int, bool] = {}
+
+# --- 联想搜索 (typeahead) 索引 ---
+# NBA 官方 ID -> (规范化全名, 原始球员数据)
+_players: Dict[int, Tuple[str, dict]] = {}
+# 单词前缀 -> 球员 ID 集合，例如 "leb" -> {LeBron James}
+_prefix_index: Dict[str, Set[int]] = {}
+# 三元组 (trigram) -> {(球员 ID, 单词位置)}，前缀匹配不到时用于容错（拼写错误）；
+# 按单词建立，"jokc" 与 "jokic" 这个单词比较，而不是与整个 "nikola jokic" 比较
+_trigram_index: Dict[str, Set[Tuple[int, int]]] = {}
+
+# 索引在后台线程中建立：建立期间持有锁，完成后 _index_ready 置为 True
+_index_lock = threading.Lock()
+_index_ready = False
+
+# 查询结果缓存（包括查不到的 None），同一个名字只解析一次；
+# 解析完全在本地进行，所以只用进程内后端，不放进共享缓存
+player_id_cache = MemoryBackend(PLAYER_ID_CACHE_MAX_ENTRIES, name="player_id")
+
+
+def normalize_name(name: str, strip_suffix: bool = False) -> str:
+    """
+    规范化球员姓名：去掉重音符号和标点、统一大小写，可选去掉 Jr./III 等后缀。
+    例如 "Luka Dončić" -> "luka doncic"，"P.J. Washington" -> "pj washington"
+    """
+    if not name:
+        return ""
+    text = unicodedata.normalize("NFKD", name)
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    text = _DROP_CHARS.sub("", text)
+    tokens = _NON_ALNUM.sub(" ", text).split()
+    if strip_suffix:
+        while len(tokens) > 1 and tokens[-1] in NAME_SUFFIXES:
+            tokens.pop()
+    return " ".join(tokens)
+
+
+def _prefer(index: Dict[str, int], key: str, player_id: int):
+    """
+    同名球员：优先现役，其次 ID 更大（更近期）的球员
+    """
+    current = index.get(key)
+    if current is None or (_is_active[player_id], player_id) > (_is_active[current], current):
+        index[key] = player_id
+
+
+def build_index():
+    """
+    根据 nba_api 的静态球员列表建立索引（约 0.3 秒）。
+    应用启动后在后台线程中调用一次；在此之前到达的查询会等它完成
+    """
+    with _index_lock:
+        _build_index_locked()
+
+
+def _build_index_locked():
+    global _index_ready
+    _index_ready = False
+    started_at = time.perf_counter()
+    _exact_index.clear()
+    _base_index.clear()
+    _last_name_index.clear()
+    _is_active.clear()
+    _players.clear()
+    _prefix_index.clear()
+    _trigram_index.clear()
+    player_id_cache.clear()
+
+    for player in players.get_players():
+        player_id = player["id"]
+        _is_active[player_id] = bool(player.get("is_active"))
+        names = {player["full_name"], f"{player['first_name']} {player['last_name']}"}
+        for name in names:
+            _prefer(_exact_index, normalize_name(name), player_id)
+            _prefer(_base_index, normalize_name(name, strip_suffix=True), player_id)
+        last = normalize_name(player["last_name"], strip_suffix=True)
+        if last:
+            _last_name_index.setdefault(last, []).append(
+                (normalize_name(player["first_name"]), player_id)
+            )
+
+        full = normalize_name(player["full_name"])
+        _players[player_id] = (full, player)
+        for token in full.split():
+            for end in range(1, len(token) + 1):
+                _prefix_index.setdefault(token[:end], set()).add(player_id)
+        for position, token in enumerate(full.split()):
+            for trigram in _trigrams(token):
+                _trigram_index.setdefault(trigram, set()).add((player_id, position))
+    _index_ready = True
+    logger.info("Player index built: %d players in %.3fs", len(_players), time.perf_counter() - started_at)
+
+
+def _trigrams(token: str) -> Set[str]:
+    # 单词两端补空格，词首和词尾的字母也能组成三元组
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _ensure_index():
+    """
+    同步查询前调用：后台线程正在建立时等它完成，还没开始（例如脚本中直接调用）时自己建立。
+    会阻塞在建立索引的锁上，事件循环中的调用方要先 await wait_until_ready()
+    """
+    if _index_ready:
+        return
+    with _index_lock:
+        if not _index_ready:
+            _build_index_locked()
+
+
+async def wait_until_ready():
+    """
+    异步调用方在查询（resolve_id / resolve_ids / suggest）前调用：
+    索引还没建好时在线程中等待，不在事件循环线程上获取建立索引的锁
+    """
+    if not _index_ready:
+        await asyncio.to_thread(_ensure_index)
+
+
+def _lookup(name: str) -> Optional[int]:
+    player_id = _exact_index.get(normalize_name(name))
+    if player_id is not None:
+        return player_id
+
+    base = normalize_name(name, strip_suffix=True)
+    player_id = _base_index.get(base)
+    if player_id is not None:
+        return player_id
+
+    # 最后尝试：姓氏相同，且一方的名字是另一方的前缀（"Nic" / "Nicolas"）
+    first, _, last = base.partition(" ")
+    candidates = [
+        pid for other_first, pid in _last_name_index.get(last, [])
+        if other_first and first and (other_first.startswith(first) or first.startswith(other_first))
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda pid: (_is_active[pid], pid))
+
+
+def resolve_id(name: str) -> Optional[int]:
+    """
+    通过球员全名获取 NBA 官方 ID，找不到返回 None（结果同样会被缓存）
+    """
+    if name in player_id_cache:
+        metrics.cache_requests.labels("player_id", "hit").inc()
+        return player_id_cache.get(name)
+    metrics.cache_requests.labels("player_id", "miss").inc()
+    _ensure_index()
+    player_id = _lookup(name)
+    player_id_cache.set(name, player_id, FOREVER)
+    return player_id
+
+
+def resolve_ids(names: Iterable[str]) -> Dict[str, Optional[int]]:
+    """
+    批量获取 NBA 官方 ID，返回 {姓名: ID 或 None}
+    """
+    return {name: resolve_id(name) for name in names}
+
+
+def get_nba_player_id_by_name(firstname: str, lastname: str) -> Optional[int]:
+    """
+    通过球员姓名获取 NBA 官方 ID
+    这个 ID 可以直接用于构建 NBA.com 的头像 URL
+    """
+    return resolve_id(f"{firstname} {lastname}")
+
+
+def _suggestion(player_id: int, match: str) -> dict:
+    player = _players[player_id][1]
+    return {
+        "nba_official_id": player_id,
+        "full_name": player["full_name"],
+        "first_name": player["first_name"],
+        "last_name": player["last_name"],
+        "is_active": bool(player.get("is_active")),
+        "match": match,
+    }
+
+
+def suggest(query: str, limit: int = 10) -> List[dict]:
+    """
+    球员联想搜索，完全基于内存索引，不访问任何上游 API。
+    排序规则：匹配质量（完全匹配 > 全名前缀 > 各单词前缀 > 模糊匹配），
+    同等质量下现役球员优先，然后是名字更短（更接近输入）的球员。
+    """
+    normalized = normalize_name(query)
+    if not normalized or limit <= 0:
+        return []
+    _ensure_index()
+
+    candidates: Optional[Set[int]] = None
+    for token in normalized.split():
+        matches = _prefix_index.get(token, set())
+        candidates = matches if candidates is None else candidates & matches
+        if not candidates:
+            break
+
+    if candidates:
+        def rank(player_id: int):
+            full = _players[player_id][0]
+            quality = 0 if full == normalized else 1 if full.startswith(normalized) else 2
+            return (quality, not _is_active[player_id], len(full), full)
+
+        best = heapq.nsmallest(limit, candidates, key=rank)
+        labels = ("exact", "prefix", "token_prefix")
+        return [_suggestion(pid, labels[rank(pid)[0]]) for pid in best]
+
+    # 前缀匹配不到：模糊匹配。输入的每个单词与球员姓名中最相近的单词比较
+    # （共享三元组占输入单词三元组的比例），各单词的平均相似度至少一半
+    if len(normalized) < 3:
+        return []
+    tokens = normalized.split()
+    similarity: Counter = Counter()
+    for token in tokens:
+        token_trigrams = _trigrams(token)
+        shared = Counter()
+        for trigram in token_trigrams:
+            shared.update(_trigram_index.get(trigram, ()))
+        best_token: Dict[int, int] = {}
+        for (player_id, _), count in shared.items():
+            best_token[player_id] = max(best_token.get(player_id, 0), count)
+        for player_id, count in best_token.items():
+            similarity[player_id] += count / len(token_trigrams) / len(tokens)
+    fuzzy = [pid for pid, score in similarity.items() if score >= 0.5]
+    best = heapq.nsmallest(
+        limit, fuzzy,
+        key=lambda pid: (-similarity[pid], not _is_active[pid], len(_players[pid][0]))
+    )
+    return [_suggestion(pid, "fuzzy") for pid in best]
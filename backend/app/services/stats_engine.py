@@ -0,0 +1,138 @@
+from typing import TYPE_CHECKING, Dict, List, Optional
+from app.services import nba_service
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# 输出字段 -> API-Sports 每场比赛数据中的字段
+STAT_FIELDS = {
+    "points": "points",
+    "rebounds": "totReb",
+    "assists": "assists",
+    "steals": "steals",
+    "blocks": "blocks",
+    "offensive_rebounds": "offReb",
+    "defensive_rebounds": "defReb",
+    "turnovers": "turnovers",
+    "fouls": "pFouls",
+    "fgm": "fgm",
+    "fga": "fga",
+    "tpm": "tpm",
+    "tpa": "tpa",
+    "ftm": "ftm",
+    "fta": "fta",
+    "plus_minus": "plusMinus",
+}
+STAT_NAMES = list(STAT_FIELDS)
+_COLUMN = {name: i for i, name in enumerate(STAT_NAMES)}
+
+# 近期状态：最近 N 场的场均数据
+FORM_WINDOWS = (5, 10)
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _parse_minutes(value) -> float:
+    """
+    上场时间可能是 "30"、"30:15" 或数字，统一转换为分钟（浮点数），无法解析返回 0
+    """
+    if isinstance(value, str) and ":" in value:
+        minutes, _, seconds = value.partition(":")
+        return _to_float(minutes) + _to_float(seconds) / 60
+    return _to_float(value)
+
+
+def _game_order(game: dict) -> float:
+    game_info = game.get("game")
+    return _to_float(game_info.get("id")) if isinstance(game_info, dict) else 0.0
+
+
+def to_columns(games: List[dict]):
+    """
+    把每场比赛的字典列表一次性转换为列式数组：
+    返回 (上场时间数组, 比赛数×统计项 的矩阵)，按比赛顺序排列
+    """
+    import numpy as np  # 延迟导入：只有计算球员数据时才需要（服务启动后会在后台预加载）
+
+    games = sorted(games, key=_game_order)
+    minutes = np.fromiter((_parse_minutes(g.get("min")) for g in games), dtype=np.float64, count=len(games))
+    matrix = np.array(
+        [[_to_float(g.get(field)) for field in STAT_FIELDS.values()] for g in games],
+        dtype=np.float64,
+    ).reshape(len(games), len(STAT_NAMES))
+    return minutes, matrix
+
+
+def _ratio(numerator, denominator) -> Optional[float]:
+    return round(float(numerator) / float(denominator), 3) if denominator > 0 else None
+
+
+def _row(values: "np.ndarray", digits: int = 1) -> Dict[str, float]:
+    return {name: round(float(v), digits) for name, v in zip(STAT_NAMES, values)}
+
+
+def summarize(games: List[dict]) -> dict:
+    """
+    计算一个赛季（或生涯）的统计：场均、总计、命中率、每36分钟数据、近期状态。
+    只统计上场时间大于 0 的比赛；没有有效比赛时返回空字典。
+    """
+    if not games:
+        return {}
+    minutes, matrix = to_columns(games)
+    played = minutes > 0
+    minutes, matrix = minutes[played], matrix[played]
+    games_played = int(played.sum())
+    if games_played == 0:
+        return {}
+
+    totals = matrix.sum(axis=0)
+    averages = totals / games_played
+    total_minutes = float(minutes.sum())
+    col = lambda name: totals[_COLUMN[name]]
+
+    stats = {
+        "games_played": games_played,
+        # 兼容前端：场均数据直接放在顶层
+        **{name: round(float(averages[_COLUMN[name]]), 1)
+           for name in ("points", "rebounds", "assists", "steals", "blocks")},
+        "minutes": round(total_minutes / games_played, 1),
+        "averages": _row(averages),
+        "totals": {**_row(totals, 0), "minutes": round(total_minutes)},
+        "shooting": {
+            "fg_pct": _ratio(col("fgm"), col("fga")),
+            "tp_pct": _ratio(col("tpm"), col("tpa")),
+            "ft_pct": _ratio(col("ftm"), col("fta")),
+            "efg_pct": _ratio(col("fgm") + 0.5 * col("tpm"), col("fga")),
+            "ts_pct": _ratio(col("points"), 2 * (col("fga") + 0.44 * col("fta"))),
+        },
+        "per36": _row(totals * (36 / total_minutes)) if total_minutes > 0 else {},
+    }
+    for window in FORM_WINDOWS:
+        recent = matrix[-window:]
+        stats[f"last_{window}"] = {
+            "games": len(recent),
+            "minutes": round(float(minutes[-window:].mean()), 1),
+            **_row(recent.mean(axis=0)),
+        }
+    return stats
+
+
+async def get_season_stats(player_id: int, season: str) -> dict:
+    """
+    获取球员某个赛季（season="all" 表示生涯）的统计结果。
+    原始数据由 players.statistics 缓存（已结束的赛季永久缓存），这里不再单独缓存计算结果。
+    返回 {"games": 原始比赛场数, "team": 该赛季所在球队, "statistics": 统计结果}
+    """
+    data = await nba_service.get_player_statistics(player_id, season)
+    games = data.get("response") or []
+    first_team = games[0].get("team") if games else None
+    return {
+        "games": len(games),
+        "team": first_team,
+        "statistics": summarize(games),
+    }
@@ -0,0 +1,62 @@
+import logging
+from typing import List, Optional
+from app import registry
+from app.services import nba_service
+
+logger = logging.getLogger(__name__)
+
+# API-Sports 球队数据合并在注册表中（随注册表快照持久化），只需从 API-Sports 拉取一次；
+# 名称规范化和搜索索引都由注册表提供
+
+
+def is_ready() -> bool:
+    return registry.is_hydrated()
+
+
+async def hydrate() -> int:
+    """
+    从 API-Sports 拉取全部 NBA 球队并合并到注册表，返回合并的球队数量
+    """
+    data = await nba_service.get_all_teams()
+    teams = [
+        team for team in data.get("response", [])
+        if team.get("nbaFranchise") and not team.get("allStar")
+    ]
+    if not teams:
+        return 0
+    hydrated = registry.hydrate(teams)
+    logger.info("Hydrated %d teams from API-Sports", hydrated)
+    return hydrated
+
+
+async def ensure_loaded():
+    """
+    启动时调用：注册表快照中已有 API-Sports 球队数据时直接使用，没有的话再从 API-Sports 拉取
+    """
+    if is_ready():
+        logger.info("Loaded %d teams from the registry snapshot", len(all_teams()))
+        return
+    try:
+        await hydrate()
+    except Exception as e:
+        logger.warning("Hydration failed, falling back to API search: %s", e)
+
+
+def all_teams() -> List[dict]:
+    return [record.api_team for record in registry.all_teams() if record.api_team]
+
+
+def search(query: str) -> List[dict]:
+    """
+    本地模糊搜索球队：支持全称、昵称、城市、代码以及它们的前缀，
+    例如 "lakers"、"LAL"、"golden"、"los ang"
+    """
+    return [record.api_team for record in registry.search(query) if record.api_team]
+
+
+def resolve(team_name: str) -> Optional[dict]:
+    """
+    将球队名称（或代码、昵称）解析为球队数据，找不到返回 None
+    """
+    results = search(team_name)
+    return results[0] if results else None
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, List, Tuple
+from app.core.cache import is_cached
+from app.core.rate_limiter import Priority, QuotaExceeded, current_priority
+from app.core.config import WARMUP_SEASONS, WARMUP_CONCURRENCY, WARMUP_BUDGET
+from app.services import nba_service, leaders_service, team_directory
+
+logger = logging.getLogger(__name__)
+
+# 预热进度（供 /debug/warmup 查看）
+status = {
+    "state": "idle",        # idle / running / finished / failed / cancelled
+    "total": 0,             # 计划执行的任务数
+    "done": 0,              # 已完成（包括命中缓存的）
+    "cached": 0,            # 本来就在缓存中、无需请求上游的任务数
+    "failed": 0,
+    "skipped": 0,           # 因超出预热预算或上游额度而跳过的任务数
+    "upstream_requests": 0,
+    "budget": 0,
+    "started_at": None,
+    "finished_at": None,
+}
+
+# (描述, 缓存端点名, 参数, 执行函数)
+_Job = Tuple[str, str, tuple, Callable[..., Awaitable]]
+
+
+def _plan(seasons: List[str]) -> List[_Job]:
+    jobs: List[_Job] = []
+    for season in seasons:
+        # 每个赛季一张场均数据表即可覆盖所有榜单类别
+        jobs.append((f"leaders {season}", "leaders.season", (season,),
+                     leaders_service.get_season_leaders_data))
+    for team in team_directory.all_teams():
+        for season in seasons:
+            jobs.append((f"roster {team.get('code')} {season}", "players.roster", (team["id"], season),
+                         nba_service.get_team_roster))
+    return jobs
+
+
+async def run(seasons: List[str] = WARMUP_SEASONS,
+              concurrency: int = WARMUP_CONCURRENCY,
+              budget: int = WARMUP_BUDGET):
+    """
+    后台预热：球队资料 -> 各赛季联盟榜单 -> 每支球队各赛季阵容。
+    同时最多 concurrency 个请求；已缓存的数据直接跳过，不占用请求预算；
+    预算用完后剩余任务记为 skipped。
+    """
+    # 预热属于后台流量，排在交互请求之后，且不会用掉为交互请求保留的额度
+    current_priority.set(Priority.BACKGROUND)
+    status.update(state="running", total=0, done=0, cached=0, failed=0, skipped=0,
+                  upstream_requests=0, budget=budget, started_at=time.time(), finished_at=None)
+    try:
+        # 1. 球队资料（后续阵容预热需要球队 ID）
+        if not team_directory.is_ready():
+            status["upstream_requests"] += 1
+            await team_directory.ensure_loaded()
+
+        jobs = _plan(seasons)
+        status["total"] = len(jobs)
+        logger.info("Warmup started: %d jobs, concurrency=%d, budget=%d", len(jobs), concurrency, budget)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run_job(job: _Job):
+            label, endpoint, args, func = job
+            async with semaphore:
+                if await is_cached(endpoint, *args):
+                    status["cached"] += 1
+                elif status["upstream_requests"] >= budget:
+                    status["skipped"] += 1
+                    return
+                else:
+                    status["upstream_requests"] += 1
+                try:
+                    await func(*args)
+                    status["done"] += 1
+                except QuotaExceeded as e:
+                    status["skipped"] += 1
+                    logger.info("Warmup %s skipped: %s", label, e)
+                except Exception as e:
+                    status["failed"] += 1
+                    logger.warning("Warmup %s failed: %s", label, e)
+            finished = status["done"] + status["failed"] + status["skipped"]
+            if finished % 10 == 0 or finished == status["total"]:
+                logger.info("Warmup progress: %d/%d (%d/%d upstream requests)",
+                            finished, status["total"], status["upstream_requests"], budget)
+
+        await asyncio.gather(*(run_job(job) for job in jobs))
+        status["state"] = "finished"
+        logger.info("Warmup finished", extra={"warmup": dict(status)})
+    except asyncio.CancelledError:
+        status["state"] = "cancelled"
+        raise
+    except Exception as e:
+        status["state"] = "failed"
+        logger.exception("Warmup failed: %s", e)
+    finally:
+        status["finished_at"] = time.time()
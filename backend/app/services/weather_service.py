@@ -1,44 +1,99 @@
-import httpx
 import asyncio
-from app.core.config import WEATHER_API_KEY
+import logging
+from typing import Optional
+from app.core.cache import cached
+from app.core.config import WEATHER_API_KEY, OPENWEATHERMAP_URL, CACHE_WEATHER_TTL
+from app.core.http_client import get_client, register_upstream
+from app.core.singleflight import coalesced
+from app import registry
+
+logger = logging.getLogger(__name__)
 
 # OpenWeatherMap API 不同端点
-CURRENT_WEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
-FORECAST_URL = "https://api.openweathermap.org/data/2.5/forecast"
-AIR_POLLUTION_URL = "https://api.openweathermap.org/data/2.5/air_pollution"
+CURRENT_WEATHER_URL = f"{OPENWEATHERMAP_URL}/data/2.5/weather"
+FORECAST_URL = f"{OPENWEATHERMAP_URL}/data/2.5/forecast"
+AIR_POLLUTION_URL = f"{OPENWEATHERMAP_URL}/data/2.5/air_pollution"
+register_upstream(CURRENT_WEATHER_URL, "openweathermap")
+
+# 坐标保留的小数位数（约 10 米），同一场馆的请求落到同一个缓存键上
+COORDINATE_PRECISION = 4
+
+# 天气数据变化不快，各端点的结果都短时间缓存。
+# 上游出错（含额度不足）直接抛出，由调用方的熔断器计为失败、由 cached() 返回旧数据；
+# 只有缺少配置或输入时返回 None（不缓存）
 
+@cached("weather.current", CACHE_WEATHER_TTL, should_cache=bool)
+@coalesced("weather.current")
 async def get_weather_by_city(city: str):
     """
     根据城市名称获取当前天气
     """
     if not WEATHER_API_KEY:
-        print("Warning: WEATHER_API_KEY not configured")
+        logger.warning("WEATHER_API_KEY not configured")
         return None
-    
+
     if not city or city.strip() == "":
-        print("Warning: Empty city name provided")
+        logger.warning("Empty city name provided")
+        return None
+
+    client = get_client(CURRENT_WEATHER_URL)
+    params = {
+        "q": city,
+        "appid": WEATHER_API_KEY,
+        "units": "metric" # 使用摄氏度
+    }
+
+    response = await client.get(CURRENT_WEATHER_URL, params=params)
+    if response.status_code == 404:
+        # 城市名无法识别不是上游故障，不计入熔断
+        logger.warning("OpenWeatherMap does not know city '%s'", city)
+        return None
+    response.raise_for_status()
+    data = response.json()
+    logger.debug("Weather data fetched for %s", city)
+    return data
+
+@cached("weather.current.coords", CACHE_WEATHER_TTL, should_cache=bool)
+@coalesced("weather.current.coords")
+async def get_weather_by_coordinates(lat: float, lon: float):
+    """
+    根据经纬度获取当前天气（不需要先把城市名解析成坐标）
+    """
+    if not WEATHER_API_KEY:
+        logger.warning("WEATHER_API_KEY not configured")
         return None
 
-    async with httpx.AsyncClient() as client:
-        params = {
-            "q": city,
-            "appid": WEATHER_API_KEY,
-            "units": "metric" # 使用摄氏度
-        }
-        
-        try:
-            response = await client.get(CURRENT_WEATHER_URL, params=params)
-            response.raise_for_status()
-            data = response.json()
-            print(f"✓ Weather data fetched successfully for {city}")
-            return data
-        except httpx.HTTPStatusError as e:
-            print(f"✗ OpenWeatherMap API error for city '{city}': {e.response.status_code} - {e.response.text if hasattr(e.response, 'text') else 'No details'}")
-            return None
-        except Exception as e:
-            print(f"✗ Unexpected error fetching weather for '{city}': {e}")
-            return None
+    client = get_client(CURRENT_WEATHER_URL)
+    params = {
+        "lat": lat,
+        "lon": lon,
+        "appid": WEATHER_API_KEY,
+        "units": "metric"
+    }
 
+    response = await client.get(CURRENT_WEATHER_URL, params=params)
+    response.raise_for_status()
+    data = response.json()
+    logger.debug("Weather data fetched for coordinates (%s, %s)", lat, lon)
+    return data
+
+async def _fetch_forecast(params: dict, label: str):
+    client = get_client(FORECAST_URL)
+    params = {
+        **params,
+        "appid": WEATHER_API_KEY,
+        "units": "metric",
+        "cnt": 8  # 获取未来24小时的预报（8个3小时间隔）
+    }
+
+    response = await client.get(FORECAST_URL, params=params)
+    response.raise_for_status()
+    data = response.json()
+    logger.debug("Weather forecast fetched for %s", label)
+    return data
+
+@cached("weather.forecast", CACHE_WEATHER_TTL, should_cache=bool)
+@coalesced("weather.forecast")
 async def get_weather_forecast(city: str):
     """
     获取5天天气预报（每3小时一个数据点）
@@ -46,25 +101,20 @@ async def get_weather_forecast(city: str):
     """
     if not WEATHER_API_KEY or not city:
         return None
-    
-    async with httpx.AsyncClient() as client:
-        params = {
-            "q": city,
-            "appid": WEATHER_API_KEY,
-            "units": "metric",
-            "cnt": 8  # 获取未来24小时的预报（8个3小时间隔）
-        }
-        
-        try:
-            response = await client.get(FORECAST_URL, params=params)
-            response.raise_for_status()
-            data = response.json()
-            print(f"✓ Weather forecast fetched for {city}")
-            return data
-        except Exception as e:
-            print(f"✗ Failed to fetch forecast for {city}: {e}")
-            return None
+    return await _fetch_forecast({"q": city}, city)
+
+@cached("weather.forecast.coords", CACHE_WEATHER_TTL, should_cache=bool)
+@coalesced("weather.forecast.coords")
+async def get_weather_forecast_by_coordinates(lat: float, lon: float):
+    """
+    根据经纬度获取天气预报
+    """
+    if not WEATHER_API_KEY:
+        return None
+    return await _fetch_forecast({"lat": lat, "lon": lon}, f"coordinates ({lat}, {lon})")
 
+@cached("weather.air_quality", CACHE_WEATHER_TTL, should_cache=bool)
+@coalesced("weather.air_quality")
 async def get_air_quality(lat: float, lon: float):
     """
     获取空气质量数据
@@ -73,63 +123,98 @@ async def get_air_quality(lat: float, lon: float):
     """
     if not WEATHER_API_KEY or not lat or not lon:
         return None
-    
-    async with httpx.AsyncClient() as client:
-        params = {
-            "lat": lat,
-            "lon": lon,
-            "appid": WEATHER_API_KEY
-        }
-        
-        try:
-            response = await client.get(AIR_POLLUTION_URL, params=params)
-            response.raise_for_status()
-            data = response.json()
-            print(f"✓ Air quality data fetched for coordinates ({lat}, {lon})")
-            return data
-        except Exception as e:
-            print(f"✗ Failed to fetch air quality: {e}")
-            return None
 
+    client = get_client(AIR_POLLUTION_URL)
+    params = {
+        "lat": lat,
+        "lon": lon,
+        "appid": WEATHER_API_KEY
+    }
+
+    response = await client.get(AIR_POLLUTION_URL, params=params)
+    response.raise_for_status()
+    data = response.json()
+    logger.debug("Air quality data fetched for coordinates (%s, %s)", lat, lon)
+    return data
+
+def _combine(current_weather, forecast, air_quality):
+    # 预报和空气质量是附加信息，出错时只缺这一部分
+    for part, result in (("forecast", forecast), ("air quality", air_quality)):
+        if isinstance(result, Exception):
+            logger.warning("Weather %s unavailable: %r", part, result)
+    # 组合所有数据
+    return {
+        "current": current_weather,
+        "forecast": forecast if forecast and not isinstance(forecast, Exception) else None,
+        "air_quality": air_quality if air_quality and not isinstance(air_quality, Exception) else None
+    }
+
+@coalesced("weather.comprehensive")
 async def get_comprehensive_weather(city: str):
     """
     综合获取天气信息：
     1. 当前天气 (Current Weather API)
     2. 天气预报 (5 Day Forecast API)
     3. 空气质量 (Air Pollution API)
-    
-    这样调用了OpenWeatherMap的3个不同API端点，体现API集成的丰富性
+
+    这样调用了OpenWeatherMap的3个不同API端点，体现API集成的丰富性。
+    空气质量需要经纬度，只能等当前天气返回后再请求；
+    已知坐标时请使用 get_comprehensive_weather_by_coordinates，三个请求同时发出。
     """
     if not city:
         return None
-    
-    # 首先获取当前天气（包含经纬度信息）
-    current_weather = await get_weather_by_city(city)
-    
+
+    # 首先获取当前天气（包含经纬度信息），同时开始获取预报
+    forecast_task = asyncio.ensure_future(get_weather_forecast(city))
+    try:
+        current_weather = await get_weather_by_city(city)
+    except BaseException:
+        forecast_task.cancel()
+        raise
+
     if not current_weather:
+        forecast_task.cancel()
         return None
-    
+
     # 提取经纬度用于空气质量查询
     lat = current_weather.get("coord", {}).get("lat")
     lon = current_weather.get("coord", {}).get("lon")
-    
+
     # 并发获取预报和空气质量数据
-    forecast_task = get_weather_forecast(city)
-    air_quality_task = get_air_quality(lat, lon) if lat and lon else None
-    
-    if air_quality_task:
+    if lat and lon:
         forecast, air_quality = await asyncio.gather(
             forecast_task,
-            air_quality_task,
+            get_air_quality(lat, lon),
             return_exceptions=True
         )
     else:
-        forecast = await forecast_task
-        air_quality = None
-    
-    # 组合所有数据
-    return {
-        "current": current_weather,
-        "forecast": forecast if forecast and not isinstance(forecast, Exception) else None,
-        "air_quality": air_quality if air_quality and not isinstance(air_quality, Exception) else None
-    }
\ No newline at end of file
+        forecast = await asyncio.gather(forecast_task, return_exceptions=True)
+        forecast, air_quality = forecast[0], None
+
+    return _combine(current_weather, forecast, air_quality)
+
+@coalesced("weather.comprehensive.coords")
+async def get_comprehensive_weather_by_coordinates(lat: float, lon: float):
+    """
+    根据已知坐标（例如场馆坐标）综合获取天气信息，三个端点同时请求，
+    比按城市名获取少一次串行的往返。
+    """
+    lat, lon = round(lat, COORDINATE_PRECISION), round(lon, COORDINATE_PRECISION)
+    current_weather, forecast, air_quality = await asyncio.gather(
+        get_weather_by_coordinates(lat, lon),
+        get_weather_forecast_by_coordinates(lat, lon),
+        get_air_quality(lat, lon),
+        return_exceptions=True
+    )
+    if isinstance(current_weather, BaseException):
+        raise current_weather
+    if not current_weather:
+        return None
+    return _combine(current_weather, forecast, air_quality)
+
+def arena_location(team_code: str) -> Optional[tuple]:
+    """
+    通过球队代码获取场馆的 (纬度, 经度)，未知球队返回 None
+    """
+    team = registry.get_team(team_code)
+    return team.location if team else None
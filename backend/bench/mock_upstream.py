@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+基准测试用的本地模拟上游：API-Sports、NewsAPI、OpenWeatherMap、Unsplash 和 stats.nba.com。
+
+每个提供方监听一个端口（从 --base-port 开始，按 PROVIDERS 的顺序），
+返回结构与真实接口一致的数据（同样的参数总是得到同样的数据），
+并按可配置的延迟分布（对数正态）和错误率响应。
+
+运行: python -m bench.mock_upstream --base-port 9100 [--profile profile.json]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import zlib
+from pathlib import Path
+from typing import Dict
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# 只用到静态注册表：配置模块要求有 API key，模拟服务也不需要写注册表快照
+os.environ.setdefault("NBA_API_KEY", "bench")
+os.environ.setdefault("REGISTRY_SNAPSHOT_PATH", "")
+
+from app import registry  # noqa: E402  静态球队数据，模拟球队和场馆
+
+# 提供方 -> 默认延迟分布：中位数（毫秒）、对数正态 sigma、错误率（返回 500）
+PROVIDERS: Dict[str, dict] = {
+    "api-sports": {"median_ms": 150, "sigma": 0.5, "error_rate": 0.0},
+    "newsapi": {"median_ms": 250, "sigma": 0.6, "error_rate": 0.0},
+    "openweathermap": {"median_ms": 80, "sigma": 0.4, "error_rate": 0.0},
+    "unsplash": {"median_ms": 200, "sigma": 0.5, "error_rate": 0.0},
+    "nba-stats": {"median_ms": 600, "sigma": 0.5, "error_rate": 0.0},
+}
+
+FIRST_NAMES = ["LeBron", "Stephen", "Kevin", "Luka", "Nikola", "Jayson", "Joel", "Giannis",
+               "Anthony", "Devin", "Jimmy", "Damian", "Kawhi", "Trae", "Donovan", "Zion"]
+LAST_NAMES = ["James", "Curry", "Durant", "Doncic", "Jokic", "Tatum", "Embiid", "Antetokounmpo",
+              "Davis", "Booker", "Butler", "Lillard", "Leonard", "Young", "Mitchell", "Williamson"]
+POSITIONS = ["G", "F", "C", "G-F", "F-C"]
+
+
+class LatencyModel:
+    def __init__(self, median_ms: float, sigma: float, error_rate: float, seed: int):
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+
+    async def wait(self) -> bool:
+        """
+        模拟一次上游调用的耗时，返回 False 表示这次应该返回错误
+        """
+        delay = self.median_ms * math.exp(self._random.gauss(0, self.sigma)) / 1000
+        await asyncio.sleep(delay)
+        return self._random.random() >= self.error_rate
+
+
+def _seeded(*parts) -> random.Random:
+    # 内置 hash 每个进程随机化，这里用 crc32 保证不同运行之间数据一致
+    return random.Random(zlib.crc32("|".join(str(p) for p in parts).encode("utf-8")))
+
+
+def _with_latency(app: FastAPI, model: LatencyModel):
+    @app.middleware("http")
+    async def latency(request: Request, call_next):
+        if not await model.wait():
+            return JSONResponse({"errors": {"mock": "injected failure"}}, status_code=500)
+        return await call_next(request)
+    return app
+
+
+# --- API-Sports ---
+
+def _team(index: int, team: registry.TeamRecord) -> dict:
+    return {
+        "id": index + 1, "name": team.name, "nickname": team.nickname, "code": team.code,
+        "city": team.city, "logo": f"https://example.invalid/logos/{team.code}.png",
+        "allStar": False, "nbaFranchise": True,
+        "leagues": {"standard": {"conference": "East" if index % 2 else "West", "division": "Mock"}},
+    }
+
+
+TEAMS = [_team(i, team) for i, team in enumerate(registry.all_teams())]
+
+
+def _player(player_id: int) -> dict:
+    rng = _seeded("player", player_id)
+    return {
+        "id": player_id,
+        "firstname": FIRST_NAMES[player_id % len(FIRST_NAMES)],
+        "lastname": LAST_NAMES[(player_id // len(FIRST_NAMES)) % len(LAST_NAMES)],
+        "birth": {"date": f"{rng.randint(1985, 2003)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}", "country": "USA"},
+        "nba": {"start": rng.randint(2003, 2022), "pro": rng.randint(0, 18)},
+        "height": {"feets": "6", "inches": str(rng.randint(0, 11)), "meters": "1.98"},
+        "weight": {"pounds": str(rng.randint(180, 280)), "kilograms": "100"},
+        "leagues": {"standard": {"jersey": rng.randint(0, 99), "active": True, "pos": rng.choice(POSITIONS)}},
+    }
+
+
+def _game_stats(player_id: int, season: str) -> list:
+    rng = _seeded("stats", player_id, season)
+    team = TEAMS[player_id % len(TEAMS)]
+    games = []
+    for game_id in range(rng.randint(40, 82)):
+        fga, tpa, fta = rng.randint(5, 25), rng.randint(0, 12), rng.randint(0, 12)
+        fgm, tpm, ftm = rng.randint(0, fga), 0, rng.randint(0, fta)
+        tpm = rng.randint(0, min(tpa, fgm))
+        games.append({
+            "player": {"id": player_id}, "team": team, "game": {"id": int(season) * 1000 + game_id},
+            "points": 2 * fgm + tpm + ftm, "min": f"{rng.randint(10, 40)}:{rng.randint(10, 59)}",
+            "fgm": fgm, "fga": fga, "tpm": tpm, "tpa": tpa, "ftm": ftm, "fta": fta,
+            "offReb": rng.randint(0, 4), "defReb": rng.randint(0, 10), "totReb": rng.randint(0, 14),
+            "assists": rng.randint(0, 12), "steals": rng.randint(0, 3), "blocks": rng.randint(0, 3),
+            "turnovers": rng.randint(0, 5), "pFouls": rng.randint(0, 5), "plusMinus": str(rng.randint(-20, 20)),
+        })
+    return games
+
+
+def _games_on(date: str) -> list:
+    rng = _seeded("games", date)
+    teams = rng.sample(TEAMS, 2 * rng.randint(3, 7))
+    return [
+        {
+            "id": rng.randint(10000, 99999), "date": {"start": f"{date}T00:30:00.000Z"},
+            "status": {"long": "Finished"},
+            "teams": {"home": teams[i], "visitors": teams[i + 1]},
+            "scores": {"home": {"points": rng.randint(90, 135)}, "visitors": {"points": rng.randint(90, 135)}},
+        }
+        for i in range(0, len(teams), 2)
+    ]
+
+
+def _api_sports_response(items: list) -> dict:
+    return {"errors": [], "results": len(items), "response": items}
+
+
+def api_sports_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/teams")
+    def teams(search: str = "", name: str = ""):
+        query = (search or name).casefold()
+        return _api_sports_response([t for t in TEAMS if not query or query in t["name"].casefold()])
+
+    @app.get("/players")
+    def players(id: int = None, search: str = "", team: int = None, season: str = ""):
+        if id is not None:
+            return _api_sports_response([_player(id)])
+        if team is not None:
+            return _api_sports_response([_player(team * 100 + i) for i in range(15)])
+        query = search.casefold()
+        matches = [_player(i) for i in range(1, 257) if query in _player(i)["lastname"].casefold()]
+        return _api_sports_response(matches[:10])
+
+    @app.get("/players/statistics")
+    def statistics(id: int, season: str = "2023"):
+        return _api_sports_response(_game_stats(id, season))
+
+    @app.get("/games")
+    def games(date: str):
+        return _api_sports_response(_games_on(date))
+
+    return app
+
+
+# --- NewsAPI ---
+
+def news_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/v2/everything")
+    def everything(q: str = "", pageSize: int = 10):
+        return {
+            "status": "ok",
+            "totalResults": pageSize,
+            "articles": [
+                {
+                    "source": {"id": None, "name": "Mock Sports"},
+                    "title": f"{q} headline #{i}",
+                    "description": f"Mock article {i} about {q}.",
+                    "url": f"https://example.invalid/news/{i}",
+                    "urlToImage": None,
+                    "publishedAt": "2024-01-01T00:00:00Z",
+                }
+                for i in range(pageSize)
+            ],
+        }
+
+    return app
+
+
+# --- OpenWeatherMap ---
+
+def weather_app() -> FastAPI:
+    app = FastAPI()
+
+    def current(lat: float, lon: float, name: str) -> dict:
+        rng = _seeded("weather", round(lat, 2), round(lon, 2))
+        return {
+            "coord": {"lat": lat, "lon": lon}, "name": name,
+            "weather": [{"id": 800, "main": "Clear", "description": "clear sky", "icon": "01d"}],
+            "main": {"temp": round(rng.uniform(-5, 35), 1), "feels_like": 20.0, "humidity": rng.randint(20, 90),
+                     "pressure": 1013},
+            "wind": {"speed": round(rng.uniform(0, 10), 1)},
+        }
+
+    @app.get("/data/2.5/weather")
+    def weather(q: str = "", lat: float = 34.0, lon: float = -118.0):
+        return current(lat, lon, q.split(",")[0] or "Mock City")
+
+    @app.get("/data/2.5/forecast")
+    def forecast(q: str = "", lat: float = 34.0, lon: float = -118.0, cnt: int = 8):
+        return {"cnt": cnt, "list": [{**current(lat, lon, q), "dt": 1700000000 + i * 10800} for i in range(cnt)]}
+
+    @app.get("/data/2.5/air_pollution")
+    def air_pollution(lat: float, lon: float):
+        return {"coord": {"lat": lat, "lon": lon}, "list": [{"main": {"aqi": 2}, "components": {"pm2_5": 8.1}}]}
+
+    return app
+
+
+# --- Unsplash ---
+
+def unsplash_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/search/photos")
+    def photos(query: str = ""):
+        slug = query.replace(" ", "-")
+        return {"total": 1, "results": [{"urls": {"regular": f"https://example.invalid/photos/{slug}.jpg"}}]}
+
+    return app
+
+
+# --- stats.nba.com (nba_api) ---
+
+LEADERS_HEADERS = ["PLAYER_ID", "RANK", "PLAYER", "TEAM_ID", "TEAM", "GP", "MIN", "FGM", "FGA", "FG_PCT",
+                   "FG3M", "FG3A", "FG3_PCT", "FTM", "FTA", "FT_PCT", "OREB", "DREB", "REB", "AST",
+                   "STL", "BLK", "TOV", "PTS", "EFF"]
+
+
+def nba_stats_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/stats/leagueleaders")
+    def league_leaders(Season: str = "2023-24"):
+        rng = _seeded("leaders", Season)
+        rows = []
+        for i in range(1, 501):
+            player = _player(i)
+            fga, fg3a, fta = rng.uniform(2, 22), rng.uniform(0, 10), rng.uniform(0, 10)
+            fgm, fg3m, ftm = fga * rng.uniform(0.35, 0.6), fg3a * rng.uniform(0.25, 0.45), fta * rng.uniform(0.6, 0.92)
+            team = TEAMS[i % len(TEAMS)]
+            reb, ast, stl, blk = rng.uniform(1, 13), rng.uniform(0.5, 10), rng.uniform(0, 2), rng.uniform(0, 3)
+            pts = 2 * fgm + fg3m + ftm
+            rows.append([
+                1_000_000 + i, i, f"{player['firstname']} {player['lastname']}", team["id"], team["code"],
+                rng.randint(20, 82), round(rng.uniform(10, 38), 1), round(fgm, 1), round(fga, 1),
+                round(fgm / fga, 3), round(fg3m, 1), round(fg3a, 1), round(fg3m / fg3a, 3) if fg3a else 0,
+                round(ftm, 1), round(fta, 1), round(ftm / fta, 3) if fta else 0, round(reb * 0.3, 1),
+                round(reb * 0.7, 1), round(reb, 1), round(ast, 1), round(stl, 1), round(blk, 1),
+                round(rng.uniform(0.5, 4), 1), round(pts, 1), round(pts + reb + ast, 1),
+            ])
+        return {"resource": "leagueleaders", "parameters": {"Season": Season},
+                "resultSet": {"name": "LeagueLeaders", "headers": LEADERS_HEADERS, "rowSet": rows}}
+
+    return app
+
+
+APPS = {
+    "api-sports": api_sports_app,
+    "newsapi": news_app,
+    "openweathermap": weather_app,
+    "unsplash": unsplash_app,
+    "nba-stats": nba_stats_app,
+}
+
+
+def base_urls(host: str, base_port: int) -> Dict[str, str]:
+    """
+    提供方 -> 模拟服务地址（与 serve 使用的端口分配一致）
+    """
+    return {name: f"http://{host}:{base_port + i}" for i, name in enumerate(PROVIDERS)}
+
+
+def load_profile(path: str = None, latency_scale: float = 1.0, error_rate: float = None) -> Dict[str, dict]:
+    """
+    默认延迟分布，可被 JSON 文件（{提供方: {median_ms, sigma, error_rate}}）和命令行参数覆盖
+    """
+    profile = {name: dict(settings) for name, settings in PROVIDERS.items()}
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            for name, overrides in json.load(f).items():
+                profile[name].update(overrides)
+    for settings in profile.values():
+        settings["median_ms"] *= latency_scale
+        if error_rate is not None:
+            settings["error_rate"] = error_rate
+    return profile
+
+
+async def serve(host: str, base_port: int, profile: Dict[str, dict], seed: int = 0):
+    servers = []
+    for i, (name, factory) in enumerate(APPS.items()):
+        settings = profile[name]
+        model = LatencyModel(settings["median_ms"], settings["sigma"], settings["error_rate"], seed + i)
+        config = uvicorn.Config(_with_latency(factory(), model), host=host, port=base_port + i,
+                                log_level="warning", access_log=False)
+        servers.append(uvicorn.Server(config))
+    await asyncio.gather(*(server.serve() for server in servers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--base-port", type=int, default=9100)
+    parser.add_argument("--profile", help="JSON 文件：{提供方: {median_ms, sigma, error_rate}}")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="所有中位延迟乘以这个系数")
+    parser.add_argument("--error-rate", type=float, help="覆盖所有提供方的错误率")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    profile = load_profile(args.profile, args.latency_scale, args.error_rate)
+    for name, url in base_urls(args.host, args.base_port).items():
+        print(f"{name:15s} {url}  {profile[name]}")
+    asyncio.run(serve(args.host, args.base_port, profile, args.seed))
+
+
+if __name__ == "__main__":
+    main()
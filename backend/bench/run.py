@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+负载基准测试：启动本地模拟上游（bench.mock_upstream）和指向它们的后端，
+按给定并发压测 /search、/team-details、/player-details、/leaders 和 /schedule，
+记录吞吐量和 p50/p95/p99 延迟，结果写入 JSON 文件，可与之前的结果对比。
+
+每个场景先跑一遍冷缓存（每个路径请求一次，延迟主要来自上游），
+再按每个并发级别跑稳态（缓存已预热）。
+
+运行（在 backend 目录下）:
+    python -m bench.run --concurrency 1,8,32 --requests 300
+    python -m bench.run --baseline bench/results/before.json --max-regression 0.15
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from bench.mock_upstream import LAST_NAMES, base_urls  # noqa: E402
+
+SEASON = "2023"
+TEAM_NAMES = ["Lakers", "Celtics", "Warriors", "Bulls", "Heat", "Knicks", "Nuggets", "Suns",
+              "Bucks", "Mavericks", "Raptors", "Spurs", "Jazz", "Hawks", "Pacers", "Thunder"]
+LEADER_CATEGORIES = ["points", "rebounds", "assists", "steals", "blocks"]
+SCHEDULE_START = date(2024, 1, 1)
+
+# 场景名 -> 第 i 个请求的路径；每个场景的路径集合是有限的，
+# 冷缓存阶段每个路径请求一次，稳态阶段循环使用
+SCENARIOS: Dict[str, Callable[[int], str]] = {
+    "search": lambda i: f"/search?query={LAST_NAMES[i % len(LAST_NAMES)]}",
+    "team-details": lambda i: f"/team-details/{TEAM_NAMES[i % len(TEAM_NAMES)]}?season={SEASON}",
+    "player-details": lambda i: f"/player-details/{i % 32 + 1}?season={SEASON}",
+    "leaders": lambda i: f"/leaders/{LEADER_CATEGORIES[i % len(LEADER_CATEGORIES)]}?season={SEASON}",
+    "schedule": lambda i: (
+        f"/schedule?from={SCHEDULE_START + timedelta(days=7 * (i % 4))}"
+        f"&to={SCHEDULE_START + timedelta(days=7 * (i % 4) + 6)}"
+    ),
+}
+DISTINCT_PATHS = {"search": len(LAST_NAMES), "team-details": len(TEAM_NAMES), "player-details": 32,
+                  "leaders": len(LEADER_CATEGORIES), "schedule": 4}
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    # 最近秩法，样本少时也不会插值出不存在的延迟
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    values = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 2)  # noqa: E731
+    return {
+        "requests": len(values) + errors,
+        "errors": errors,
+        "rps": round((len(values) + errors) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": ms(percentile(values, 0.50)),
+        "p95_ms": ms(percentile(values, 0.95)),
+        "p99_ms": ms(percentile(values, 0.99)),
+        "max_ms": ms(values[-1]) if values else 0.0,
+        "mean_ms": ms(sum(values) / len(values)) if values else 0.0,
+    }
+
+
+async def run_pass(client: httpx.AsyncClient, paths: List[str], concurrency: int) -> dict:
+    """
+    用 concurrency 个并发连接依次发出 paths 中的请求；非 2xx 响应和连接错误计为错误，不计入延迟
+    """
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal errors, next_index
+        while next_index < len(paths):
+            path = paths[next_index]
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+                await response.aread()
+                ok = response.is_success
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run_scenarios(app_url: str, scenarios: List[str], levels: List[int], requests: int) -> List[dict]:
+    results = []
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=app_url, limits=limits, timeout=60) as client:
+        for name in scenarios:
+            path_for = SCENARIOS[name]
+            cold_paths = [path_for(i) for i in range(DISTINCT_PATHS[name])]
+            cold = await run_pass(client, cold_paths, min(levels[0], len(cold_paths)))
+            results.append({"scenario": name, "phase": "cold", "concurrency": levels[0], **cold})
+            print(_format_row(results[-1]))
+
+            for concurrency in levels:
+                paths = [path_for(i) for i in range(requests)]
+                steady = await run_pass(client, paths, concurrency)
+                results.append({"scenario": name, "phase": "steady", "concurrency": concurrency, **steady})
+                print(_format_row(results[-1]))
+    return results
+
+
+def _format_row(row: dict) -> str:
+    return (
+        f"{row['scenario']:15s} {row['phase']:6s} c={row['concurrency']:<4d} "
+        f"n={row['requests']:<5d} err={row['errors']:<4d} rps={row['rps']:<9.1f} "
+        f"p50={row['p50_ms']:<8.1f} p95={row['p95_ms']:<8.1f} p99={row['p99_ms']:.1f}"
+    )
+
+
+def compare(results: List[dict], baseline: dict, max_regression: float) -> List[str]:
+    """
+    与基线结果逐项对比（同一场景、阶段和并发），返回超出容忍度的退化描述
+    """
+    key = lambda row: (row["scenario"], row["phase"], row["concurrency"])  # noqa: E731
+    previous = {key(row): row for row in baseline.get("results", [])}
+    regressions = []
+    for row in results:
+        before = previous.get(key(row))
+        if not before:
+            continue
+        label = "{} {} c={}".format(*key(row))
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if before[metric] and row[metric] > before[metric] * (1 + max_regression):
+                regressions.append(f"{label}: {metric} {before[metric]} -> {row[metric]}")
+        if before["rps"] and row["rps"] < before["rps"] * (1 - max_regression):
+            regressions.append(f"{label}: rps {before['rps']} -> {row['rps']}")
+        if row["errors"] > before["errors"]:
+            regressions.append(f"{label}: errors {before['errors']} -> {row['errors']}")
+    return regressions
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _app_env(urls: Dict[str, str], cache_dir: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "NBA_API_KEY": "bench", "NEWS_API_KEY": "bench", "WEATHER_API_KEY": "bench", "UNSPLASH_API_KEY": "bench",
+        "API_SPORTS_URL": urls["api-sports"],
+        "NEWS_API_URL": urls["newsapi"],
+        "OPENWEATHERMAP_URL": urls["openweathermap"],
+        "UNSPLASH_API_URL": urls["unsplash"],
+        "NBA_STATS_URL": urls["nba-stats"],
+        # 模拟上游没有配额，限流器不应成为瓶颈
+        "API_SPORTS_PER_MINUTE": "100000", "API_SPORTS_PER_DAY": "10000000",
+        "NEWS_API_PER_MINUTE": "100000", "NEWS_API_PER_DAY": "10000000",
+        "WEATHER_API_PER_MINUTE": "100000", "WEATHER_API_PER_DAY": "10000000",
+        "UNSPLASH_API_PER_MINUTE": "100000", "UNSPLASH_API_PER_DAY": "10000000",
+        "HTTP2_ENABLED": "false",  # 模拟上游是 HTTP/1.1
+        "CACHE_DIR": cache_dir,
+        "REGISTRY_SNAPSHOT_PATH": "",
+        "WARMUP_ENABLED": "false",
+        "LOG_LEVEL": "WARNING",
+    })
+    return env
+
+
+def _wait_ready(url: str, process: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"process serving {url} exited with code {process.returncode}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+
+def _stop(process: subprocess.Popen):
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="逗号分隔的场景名")
+    parser.add_argument("--concurrency", default="1,8,32", help="逗号分隔的并发级别")
+    parser.add_argument("--requests", type=int, default=200, help="每个并发级别的请求数")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--app-port", type=int, default=8765)
+    parser.add_argument("--mock-base-port", type=int, default=9100)
+    parser.add_argument("--profile", help="模拟上游的延迟分布 JSON（见 bench.mock_upstream）")
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="后端 uvicorn worker 数")
+    parser.add_argument("--output", help="结果 JSON 路径（默认 bench/results/<时间>.json）")
+    parser.add_argument("--baseline", help="之前的结果 JSON，用于对比")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="允许的退化比例，超出时退出码为 1")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})")
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    urls = base_urls(args.host, args.mock_base_port)
+    app_url = f"http://{args.host}:{args.app_port}"
+    cache_dir = tempfile.mkdtemp(prefix="nba-bench-")
+
+    mock_cmd = [sys.executable, "-m", "bench.mock_upstream", "--host", args.host,
+                "--base-port", str(args.mock_base_port), "--latency-scale", str(args.latency_scale),
+                "--seed", str(args.seed)]
+    if args.profile:
+        mock_cmd += ["--profile", args.profile]
+    if args.error_rate is not None:
+        mock_cmd += ["--error-rate", str(args.error_rate)]
+    app_cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", args.host,
+               "--port", str(args.app_port), "--workers", str(args.workers), "--log-level", "warning",
+               "--no-access-log"]
+
+    mock = subprocess.Popen(mock_cmd, cwd=BACKEND_DIR, stdout=subprocess.DEVNULL)
+    app = None
+    try:
+        for url in urls.values():
+            _wait_ready(f"{url}/docs", mock)
+        app = subprocess.Popen(app_cmd, cwd=BACKEND_DIR, env=_app_env(urls, cache_dir))
+        _wait_ready(f"{app_url}/", app)
+
+        started = time.time()
+        results = asyncio.run(run_scenarios(app_url, scenarios, levels, args.requests))
+    finally:
+        if app:
+            _stop(app)
+        _stop(mock)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started)),
+            "duration_s": round(time.time() - started, 1),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    output = Path(args.output or BACKEND_DIR / "bench" / "results" / time.strftime("%Y%m%d-%H%M%S.json"))
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.max_regression:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"no regressions beyond {args.max_regression:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
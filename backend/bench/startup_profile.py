@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+启动耗时分析：在一个全新的解释器中导入 app.main 并执行 lifespan 启动阶段，
+报告每个模块的导入耗时（python -X importtime）、各初始化步骤的耗时，
+以及延迟导入（后台预加载）的模块各自的导入耗时。
+
+运行（在 backend 目录下）:
+    python -m bench.startup_profile [--top 25] [--output startup.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# 在子进程中执行：导入应用、运行启动阶段（不处理请求）、再导入预加载模块，输出 JSON
+_CHILD = r"""
+import asyncio, importlib, json, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter() - started
+from app.core import startup
+from app.core.config import PRELOAD_MODULES
+
+async def run():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        pass
+
+asyncio.run(run())
+deferred = {}
+for name in PRELOAD_MODULES:
+    t = time.perf_counter()
+    importlib.import_module(name)
+    deferred[name] = time.perf_counter() - t
+print(json.dumps({"import_seconds": imported, "steps": startup.stats()["steps"], "deferred": deferred}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[dict]:
+    """
+    解析 -X importtime 的输出：每行 "import time: self [us] | cumulative | name"
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({
+            "module": name.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            # 缩进表示被哪个模块导入（每层两个空格）
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+        })
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=25, help="列出导入耗时（累计）最高的模块数")
+    parser.add_argument("--output", help="把完整结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("NBA_API_KEY", "profile")
+    env.setdefault("CACHE_DIR", str(BACKEND_DIR / ".cache" / "startup-profile"))
+    env.setdefault("LOG_LEVEL", "WARNING")
+    env["PRELOAD_DELAY"] = "3600"  # 预加载由这里单独计时，不在后台进行
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr[-4000:])
+        sys.exit(result.returncode)
+
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    modules = parse_importtime(result.stderr)
+    # 只统计导入 app.main 时加载的模块（预加载模块的导入输出在 app.main 之后）
+    app_index = next((i for i, m in enumerate(modules) if m["module"] == "app.main"), len(modules) - 1)
+    startup_modules = modules[:app_index + 1]
+
+    print(f"import app.main: {report['import_seconds'] * 1000:.1f} ms")
+    print(f"\ntop {args.top} modules by cumulative import time:")
+    for m in sorted(startup_modules, key=lambda m: m["cumulative_ms"], reverse=True)[:args.top]:
+        print(f"  {m['cumulative_ms']:9.1f} ms  (self {m['self_ms']:7.1f})  {m['module']}")
+
+    print("\napp modules:")
+    for m in startup_modules:
+        if m["module"] == "app" or m["module"].startswith("app."):
+            print(f"  {m['cumulative_ms']:9.1f} ms  (self {m['self_ms']:7.1f})  {m['module']}")
+
+    print("\ninitialization steps:")
+    for name, seconds in report["steps"].items():
+        print(f"  {seconds * 1000:9.1f} ms  {name}")
+
+    print("\ndeferred (preloaded after startup):")
+    for name, seconds in report["deferred"].items():
+        print(f"  {seconds * 1000:9.1f} ms  {name}")
+
+    if args.output:
+        full: Dict[str, object] = {**report, "modules": startup_modules}
+        Path(args.output).write_text(json.dumps(full, indent=2), encoding="utf-8")
+        print(f"\nresults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+测试公共配置：在导入应用之前设置环境变量（不需要真实的 API 密钥和缓存目录），
+并提供一个进程内的共享缓存替身，用来模拟多个 worker 共用的缓存和加载租约。
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+os.environ.setdefault("NBA_API_KEY", "test")
+os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="nba-universe-tests-"))
+os.environ.setdefault("CACHE_BACKEND", "memory")
+os.environ.setdefault("WARMUP_ENABLED", "false")
+
+# 添加 backend 目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from app.core import cache
+from app.core.cache_backend import CacheBackend
+
+
+class StandInSharedBackend(CacheBackend):
+    """
+    共享缓存后端的替身：数据和租约保存在一个字典里，peer() 返回共用同一份数据、
+    但租约持有者不同的另一个实例，相当于另一个 worker。
+    值写入时按 JSON 序列化一次，和真实的共享后端一样不保留对象引用
+    """
+
+    shared = True
+
+    def __init__(self, owner: str = "worker-1", store: Optional[dict] = None):
+        self.owner = owner
+        self._store = store if store is not None else {"data": {}, "leases": {}}
+
+    @property
+    def _data(self) -> Dict[Hashable, Tuple[str, float]]:
+        return self._store["data"]
+
+    @property
+    def _leases(self) -> Dict[Hashable, Tuple[str, float]]:
+        return self._store["leases"]
+
+    def peer(self, owner: str) -> "StandInSharedBackend":
+        return StandInSharedBackend(owner, self._store)
+
+    def get_with_expiry(self, key: Hashable, allow_stale: bool = False) -> Optional[Tuple[Any, float]]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        encoded, expires_at = entry
+        remaining = expires_at - time.time()
+        if remaining <= 0 and not allow_stale:
+            return None
+        return json.loads(encoded), remaining
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        if ttl > 0:
+            self._data[key] = (json.dumps(value), time.time() + ttl)
+
+    def delete(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+        self._leases.clear()
+
+    def acquire_lease(self, key: Hashable, ttl: float) -> bool:
+        lease = self._leases.get(key)
+        if lease is not None and lease[1] > time.time():
+            return False
+        self._leases[key] = (self.owner, time.time() + ttl)
+        return True
+
+    def release_lease(self, key: Hashable):
+        lease = self._leases.get(key)
+        if lease is not None and lease[0] == self.owner:
+            del self._leases[key]
+
+    def lease_held(self, key: Hashable) -> bool:
+        lease = self._leases.get(key)
+        return lease is not None and lease[1] > time.time()
+
+
+@pytest.fixture(autouse=True)
+def clean_caches():
+    cache.response_cache.clear()
+    cache._last_known.clear()
+    yield
+    cache.response_cache.clear()
+    cache._last_known.clear()
+
+
+@pytest.fixture
+def shared_backend(monkeypatch):
+    """
+    把二级缓存换成替身，并缩短租约等待的检查间隔
+    """
+    backend = StandInSharedBackend()
+    monkeypatch.setattr(cache, "shared_cache", backend)
+    monkeypatch.setattr(cache, "CACHE_LEASE_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(cache, "CACHE_LEASE_MAX_POLL_INTERVAL", 0.02)
+    monkeypatch.setattr(cache, "CACHE_LEASE_WAIT", 2)
+    return backend
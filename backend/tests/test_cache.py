@@ -0,0 +1,153 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core import cache
+from app.core.cache import cached, make_key
+from app.core.rate_limiter import QuotaExceeded
+
+# 大于 DISK_CACHE_MIN_TTL，结果会写入共享缓存（并使用加载租约）
+SHARED_TTL = 3600
+
+
+def _counting(result):
+    calls = []
+
+    async def load(arg):
+        calls.append(arg)
+        await asyncio.sleep(0.01)
+        return result if not callable(result) else result(arg)
+
+    return load, calls
+
+
+def test_concurrent_misses_call_upstream_once():
+    load, calls = _counting({"value": 1})
+    get = cached("test.coalesce", 60)(load)
+
+    async def main():
+        return await asyncio.gather(*(get("a") for _ in range(5)))
+
+    assert asyncio.run(main()) == [{"value": 1}] * 5
+    assert calls == ["a"]
+
+
+def test_lease_contention_waits_for_peer(shared_backend):
+    # 另一个 worker 先取得租约，稍后写入结果：本 worker 等它写入，不请求上游
+    load, calls = _counting({"from": "self"})
+    get = cached("test.lease", SHARED_TTL)(load)
+    lease_key = repr(make_key("test.lease", ("a",), {}))
+    peer = shared_backend.peer("worker-2")
+    assert peer.acquire_lease(lease_key, 30)
+
+    async def peer_fill():
+        await asyncio.sleep(0.05)
+        peer.set(lease_key, {"from": "peer"}, SHARED_TTL)
+        peer.release_lease(lease_key)
+
+    async def main():
+        result, _ = await asyncio.gather(get("a"), peer_fill())
+        return result
+
+    assert asyncio.run(main()) == {"from": "peer"}
+    assert calls == []
+    # 等到的结果也写入了进程内缓存
+    assert cache.response_cache.get(make_key("test.lease", ("a",), {})) == {"from": "peer"}
+
+
+def test_lease_abandoned_by_peer_loads_itself(shared_backend):
+    # 持有者放弃（没有写入结果就释放租约）：本 worker 自己请求上游
+    load, calls = _counting({"from": "self"})
+    get = cached("test.abandon", SHARED_TTL)(load)
+    lease_key = repr(make_key("test.abandon", ("a",), {}))
+    peer = shared_backend.peer("worker-2")
+    assert peer.acquire_lease(lease_key, 30)
+
+    async def peer_abandon():
+        await asyncio.sleep(0.05)
+        peer.release_lease(lease_key)
+
+    async def main():
+        result, _ = await asyncio.gather(get("a"), peer_abandon())
+        return result
+
+    assert asyncio.run(main()) == {"from": "self"}
+    assert calls == ["a"]
+    assert shared_backend.get(lease_key) == {"from": "self"}
+
+
+def test_lease_released_after_fill(shared_backend):
+    load, calls = _counting({"value": 1})
+    get = cached("test.release", SHARED_TTL)(load)
+    lease_key = repr(make_key("test.release", ("a",), {}))
+
+    asyncio.run(get("a"))
+
+    assert calls == ["a"]
+    assert not shared_backend.lease_held(lease_key)
+    assert shared_backend.peer("worker-2").acquire_lease(lease_key, 30)
+
+
+def test_short_ttl_skips_shared_cache(shared_backend):
+    load, _ = _counting({"value": 1})
+    get = cached("test.short", 1)(load)
+
+    asyncio.run(get("a"))
+
+    assert shared_backend.get(repr(make_key("test.short", ("a",), {}))) is None
+
+
+def test_stale_value_served_on_quota_exceeded():
+    state = {"fail": False}
+
+    async def load(arg):
+        if state["fail"]:
+            raise QuotaExceeded("api-sports", "daily budget exhausted")
+        return {"value": arg}
+
+    get = cached("test.stale", 0.05)(load)
+
+    async def main():
+        first = await get("a")
+        await asyncio.sleep(0.1)  # 过期
+        state["fail"] = True
+        return first, await get("a")
+
+    first, second = asyncio.run(main())
+    assert first == second == {"value": "a"}
+
+
+def test_quota_exceeded_without_stale_value_raises():
+    async def load(arg):
+        raise QuotaExceeded("api-sports", "daily budget exhausted")
+
+    get = cached("test.no_stale", 60)(load)
+
+    with pytest.raises(QuotaExceeded):
+        asyncio.run(get("a"))
+
+
+def test_stale_value_read_from_shared_cache(shared_backend):
+    # 本进程没有旧数据（例如刚重启），使用共享缓存中已过期的条目
+    key = make_key("test.shared_stale", ("a",), {})
+    shared_backend._data[repr(key)] = ('{"value": "old"}', time.time() - 10)
+
+    async def load(arg):
+        raise QuotaExceeded("api-sports", "daily budget exhausted")
+
+    get = cached("test.shared_stale", SHARED_TTL)(load)
+
+    assert asyncio.run(get("a")) == {"value": "old"}
+
+
+def test_should_cache_rejects_result():
+    load, calls = _counting({"errors": ["bad"]})
+    get = cached("test.reject", 60, should_cache=lambda value: not value.get("errors"))(load)
+
+    async def main():
+        await get("a")
+        await get("a")
+
+    asyncio.run(main())
+    assert calls == ["a", "a"]
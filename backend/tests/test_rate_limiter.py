@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from app.core import rate_limiter
+from app.core.rate_limiter import Priority, ProviderLimiter, QuotaExceeded, SharedPriority
+
+# 每 0.05 秒补充一个令牌
+PER_MINUTE = 1200
+
+
+def _drained(per_day: int = 100_000) -> ProviderLimiter:
+    limiter = ProviderLimiter("test", PER_MINUTE, per_day)
+    limiter._tokens = 0
+    return limiter
+
+
+def test_waiters_are_served_in_priority_order():
+    limiter = _drained()
+    order = []
+
+    async def request(name, level):
+        await limiter.acquire(level)
+        order.append(name)
+
+    async def main():
+        tasks = [asyncio.ensure_future(request("background", Priority.BACKGROUND))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.ensure_future(request("diagnostic", Priority.DIAGNOSTIC)))
+        await asyncio.sleep(0)
+        tasks.append(asyncio.ensure_future(request("interactive", Priority.INTERACTIVE)))
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert order == ["interactive", "background", "diagnostic"]
+
+
+def test_raising_shared_priority_moves_queued_request_forward():
+    limiter = _drained()
+    order = []
+
+    async def request(name, level, shared=None):
+        await limiter.acquire(level, shared)
+        order.append(name)
+
+    async def main():
+        shared = SharedPriority(Priority.BACKGROUND)
+        tasks = [
+            asyncio.ensure_future(request("background", Priority.BACKGROUND)),
+            asyncio.ensure_future(request("coalesced", Priority.BACKGROUND, shared)),
+        ]
+        await asyncio.sleep(0)
+        # 交互请求加入了被合并的请求
+        shared.raise_to(Priority.INTERACTIVE)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert order == ["coalesced", "background"]
+
+
+def test_wait_longer_than_max_wait_raises(monkeypatch):
+    monkeypatch.setitem(rate_limiter.RATE_LIMIT_MAX_WAIT, Priority.INTERACTIVE, 0.01)
+    limiter = _drained()
+
+    with pytest.raises(QuotaExceeded, match="rate limit wait exceeded"):
+        asyncio.run(limiter.acquire(Priority.INTERACTIVE))
+    assert limiter.rejected == 1
+
+
+def test_cancelled_waiter_leaves_queue():
+    limiter = _drained()
+
+    async def main():
+        cancelled = asyncio.ensure_future(limiter.acquire(Priority.INTERACTIVE))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert limiter._waiters == []
+        await limiter.acquire(Priority.INTERACTIVE)
+
+    asyncio.run(main())
+    assert limiter.used_today == 1
+
+
+def test_background_requests_cannot_use_interactive_reserve(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "RATE_LIMIT_INTERACTIVE_RESERVE", 0.5)
+    limiter = ProviderLimiter("test", PER_MINUTE, per_day=4)
+
+    async def main():
+        for _ in range(2):
+            await limiter.acquire(Priority.BACKGROUND)
+        with pytest.raises(QuotaExceeded):
+            await limiter.acquire(Priority.BACKGROUND)
+        await limiter.acquire(Priority.INTERACTIVE)
+
+    asyncio.run(main())
+    assert limiter.used_today == 3
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from app.core import resilience
+from app.core.rate_limiter import QuotaExceeded
+from app.core.resilience import CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(resilience.time, "monotonic", fake)
+    return fake
+
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_breaker_half_open_allows_one_probe(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_successful_probe_closes_breaker(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+
+
+def test_failed_probe_reopens_breaker(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=30)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+
+    # 半开状态下一次失败就重新断开，冷却时间从现在开始
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock.now += 29
+    assert breaker.state == "open"
+    clock.now += 1
+    assert breaker.state == "half_open"
+
+
+def test_released_probe_lets_next_request_probe(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+
+    breaker.release()
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+
+@pytest.fixture
+def breakers(monkeypatch):
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(resilience, "CIRCUIT_FAILURE_THRESHOLD", 2)
+
+
+def _run_guarded(provider, func, timeout=1.0):
+    return asyncio.run(resilience.guarded(provider, func, timeout=timeout))
+
+
+def test_guarded_opens_circuit_after_errors(breakers):
+    async def fail():
+        raise RuntimeError("boom")
+
+    async def succeed():
+        return "ok"
+
+    assert _run_guarded("provider", fail) == (None, resilience.ERROR)
+    assert _run_guarded("provider", fail) == (None, resilience.ERROR)
+    assert _run_guarded("provider", succeed) == (None, resilience.CIRCUIT_OPEN)
+    assert resilience.all_stats()["provider"]["state"] == "open"
+
+
+def test_guarded_timeout_counts_as_failure(breakers):
+    async def slow():
+        await asyncio.sleep(1)
+
+    assert _run_guarded("provider", slow, timeout=0.01) == (None, resilience.TIMEOUT)
+    assert resilience.get_breaker("provider").failures == 1
+
+
+def test_guarded_quota_exceeded_does_not_trip_breaker(breakers):
+    async def over_quota():
+        raise QuotaExceeded("provider", "daily budget exhausted")
+
+    for _ in range(3):
+        assert _run_guarded("provider", over_quota) == (None, resilience.QUOTA_EXCEEDED)
+    assert resilience.get_breaker("provider").failures == 0
+    assert resilience.get_breaker("provider").state == "closed"
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def load(arg):
+        calls.append(arg)
+        await asyncio.sleep(0.01)
+        return arg * 2
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", load, 21) for _ in range(3)))
+
+    assert asyncio.run(main()) == [42, 42, 42]
+    assert calls == [21]
+    assert len(flight) == 0
+
+
+def test_cancelled_caller_does_not_cancel_other_waiters():
+    flight = SingleFlight()
+
+    async def main():
+        release = asyncio.Event()
+
+        async def load():
+            await release.wait()
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("key", load))
+        second = asyncio.ensure_future(flight.do("key", load))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "done"
+
+
+def test_flight_finishes_after_all_callers_cancel():
+    flight = SingleFlight()
+    results = []
+
+    async def main():
+        release = asyncio.Event()
+
+        async def load():
+            await release.wait()
+            results.append("finished")
+            return "done"
+
+        caller = asyncio.ensure_future(flight.do("key", load))
+        await asyncio.sleep(0)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        # 请求仍在进行：之后到达的调用者加入它，而不是重新开始
+        assert len(flight) == 1
+        joined = asyncio.ensure_future(flight.do("key", load))
+        await asyncio.sleep(0)
+        release.set()
+        return await joined
+
+    assert asyncio.run(main()) == "done"
+    assert results == ["finished"]
+    assert len(flight) == 0
+
+
+def test_exception_reaches_every_caller_and_key_is_forgotten():
+    flight = SingleFlight()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    async def main():
+        results = await asyncio.gather(flight.do("key", load), flight.do("key", load), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert len(flight) == 0
+        # 失败不会被缓存，下一次调用重新执行
+        with pytest.raises(ValueError):
+            await flight.do("key", load)
+
+    asyncio.run(main())
+    assert calls == [1, 1]
@@ -108,6 +108,112 @@ export const useNbaStore = defineStore('nba', {
             }
         },
 
+        /**
+         * 读取后端的 NDJSON 流式接口，每收到一行 {event, data} 就回调一次
+         * 使用 fetch 而不是 axios，因为 axios 在浏览器中无法逐块读取响应
+         * @param {string} path - 接口路径
+         * @param {object} params - 查询参数
+         * @param {function} onEvent - (event, data) => void
+         */
+        async _streamNdjson(path, params, onEvent) {
+            const url = new URL(path, apiClient.defaults.baseURL);
+            Object.entries(params).forEach(([key, value]) => {
+                if (value) url.searchParams.set(key, value);
+            });
+            const response = await fetch(url);
+            if (!response.ok) {
+                throw new Error(`Request failed with status ${response.status}`);
+            }
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            for (;;) {
+                const { done, value } = await reader.read();
+                buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+                // 最后一段可能是不完整的一行，留到下次再解析
+                const lines = buffer.split('\n');
+                buffer = done ? '' : lines.pop();
+                for (const line of lines) {
+                    if (line.trim()) {
+                        const { event, data } = JSON.parse(line);
+                        onEvent(event, data);
+                    }
+                }
+                if (done) break;
+            }
+        },
+
+        /**
+         * 流式获取球队详情：球队信息先到先显示，其余部分各自到达后再补充
+         * 结果的结构与 fetchTeamDetails 相同，完成后同样存入缓存
+         * @param {string} teamName - 球队名称
+         * @param {string} season - 赛季年份 (e.g., "2023")
+         * @param {function} onUpdate - 每收到一部分数据就以当前（不完整的）详情回调
+         */
+        async streamTeamDetails(teamName, season = '2023', onUpdate = () => {}) {
+            const cacheKey = `${teamName}_${season}`;
+            if (this.teamDetails[cacheKey]) {
+                onUpdate(this.teamDetails[cacheKey]);
+                return this.teamDetails[cacheKey];
+            }
+
+            this.error = null;
+            // 尚未到达的部分为 null
+            const details = {
+                team_info: null,
+                city_context: { weather: null, image_url: null, arena_coordinates: null },
+                roster: null,
+                news: null,
+            };
+            try {
+                await this._streamNdjson(`/team-details/${encodeURIComponent(teamName)}/stream`, { season }, (event, data) => {
+                    if (event === 'team_info' || event === 'roster' || event === 'news') {
+                        details[event] = data;
+                    } else if (event === 'done') {
+                        Object.assign(details, data);
+                    } else {
+                        details.city_context[event] = data;
+                    }
+                    onUpdate({ ...details });
+                });
+                this.teamDetails[cacheKey] = details;
+                return details;
+            } catch (err) {
+                this._handleApiError(`Failed to fetch details for team ${teamName}`, err);
+                return null;
+            }
+        },
+
+        /**
+         * 流式获取球员详情，结构与 fetchPlayerDetails 相同
+         * @param {number} playerId - 球员ID
+         * @param {string} season - 赛季年份
+         * @param {function} onUpdate - 每收到一部分数据就以当前（不完整的）详情回调
+         */
+        async streamPlayerDetails(playerId, season, onUpdate = () => {}) {
+            this.error = null;
+            const details = { player_info: null, statistics: null, news: null };
+            let seasonTeam = null;
+            try {
+                await this._streamNdjson(`/player-details/${playerId}/stream`, { season }, (event, data) => {
+                    if (event === 'team') {
+                        seasonTeam = data;
+                    } else if (event !== 'done') {
+                        details[event] = data;
+                    }
+                    // 该赛季所在球队比基本信息中的球队更准确
+                    if (seasonTeam && details.player_info) {
+                        details.player_info = { ...details.player_info, team: seasonTeam };
+                    }
+                    onUpdate({ ...details });
+                });
+                return details;
+            } catch (err) {
+                this._handleApiError(`Failed to fetch details for player ${playerId}`, err);
+                return null;
+            }
+        },
+
         // In frontend/src/stores/nbaStore.js, inside actions object
 
         async fetchPlayerDetails(playerId, season) { // 移除 season 的默认值
@@ -153,6 +259,31 @@ export const useNbaStore = defineStore('nba', {
             }
         },
 
+        /**
+         * 一次获取一段日期内的赛程（周视图、月视图），按日期分组
+         * @param {string} from - 开始日期 (YYYY-MM-DD)
+         * @param {string} to - 结束日期 (YYYY-MM-DD，包含)
+         * @param {string} team - 可选，只返回该球队的比赛（名称、代码或ID）
+         * @returns {object|null} { dates: { 'YYYY-MM-DD': [games] }, unavailable: [...] }
+         */
+        async fetchScheduleRange(from, to, team = null) {
+            this.isLoading = true;
+            this.error = null;
+            try {
+                const params = { from, to };
+                if (team) {
+                    params.team = team;
+                }
+                const response = await apiClient.get('/schedule', { params });
+                return response.data;
+            } catch (err) {
+                this._handleApiError(`Failed to fetch schedule from ${from} to ${to}`, err);
+                return null;
+            } finally {
+                this.isLoading = false;
+            }
+        },
+
         /**
          * 获取并缓存联盟球员榜单
          * @param {string} category - 榜单类别 (points, rebounds, etc.)